@@ -0,0 +1,293 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from data_loader import RISK_MAPPING
+
+# =========================
+# ALERT RULES
+# =========================
+# Threshold rules breach on any row of a subject (one series in one Year)
+# whose column compares true against the value. An "escalates" rule fires
+# when a subject's highest risk level rises to the given level after it was
+# first seen, and stays active while it remains there. ``debounce`` is the
+# number of consecutive evaluations a breach must survive before it is raised;
+# a subject's state on first sight is taken as is.
+DEFAULT_ALERT_RULES = {
+    'high_risk': {'label': 'High risk', 'column': 'Risk_Score', 'op': '>=', 'value': RISK_MAPPING['High'],
+                  'severity': 'critical', 'debounce': 1},
+    'risk_escalation': {'label': 'Escalated to High risk', 'column': 'Risk_Score', 'op': 'escalates', 'value': 'High',
+                        'severity': 'critical', 'debounce': 1},
+    'predicted_gap': {'label': 'Predicted gap above 300', 'column': 'Predicted_Gap', 'op': '>', 'value': 300.0,
+                      'severity': 'critical', 'debounce': 2},
+    'backlog_change': {'label': 'Backlog growth above 10%', 'column': 'Backlog_Change_Pct', 'op': '>', 'value': 0.1,
+                       'severity': 'warning', 'debounce': 2},
+    'forward_losses': {'label': 'Forward losses beyond 500', 'column': 'ForwardLosses', 'op': '<', 'value': -500.0,
+                       'severity': 'warning', 'debounce': 2},
+}
+SEVERITIES = ('critical', 'warning')
+OPS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal}
+RECENT_ALERTS = 200
+N_LEVELS = len(RISK_MAPPING)
+
+
+# =========================
+# INCREMENTAL ALERT ENGINE
+# =========================
+class AlertEngine:
+    """Alert state for one dataset lineage, shared by every session.
+
+    Each row contributes a bitmask of the threshold rules it breaches and its
+    risk level to per-subject counts; added, changed and evicted rows adjust
+    those counts, and only the subjects they touch (plus any still waiting
+    out their debounce) are re-evaluated. An active alert is one entry per
+    (rule, subject) however many rows keep breaching. Counters for the header
+    and the most recent raises are kept as alerts change, so reading them
+    never scans the dataset.
+
+    Feed it with ``sync`` (a frame whose rows keep their positions, such as
+    forecast revisions) or ``follow`` (a telemetry RingBuffer), not both.
+    """
+
+    def __init__(self, rules=None, series=None):
+        rules = DEFAULT_ALERT_RULES if rules is None else rules
+        self.names = list(rules)
+        self.rules = [rules[name] for name in self.names]
+        self.series = series
+        self.thresholds = [i for i, rule in enumerate(self.rules) if rule['op'] in OPS]
+        self.escalations = [i for i, rule in enumerate(self.rules) if rule['op'] == 'escalates']
+        self.debounce = np.array([self.rules[i].get('debounce', 1) for i in self.thresholds])
+        self.severity = np.array([SEVERITIES.index(rule['severity']) for rule in self.rules])
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        n_rules = len(self.rules)
+        self.subjects = pd.MultiIndex.from_arrays([pd.Index([], dtype=object), pd.Index([], dtype='float64')])
+        self.breach = np.zeros((len(self.thresholds), 0), dtype=np.int64)
+        self.levels = np.zeros((N_LEVELS, 0), dtype=np.int64)
+        self.level = np.zeros(0, dtype=np.int8)
+        self.streak = np.zeros((len(self.thresholds), 0), dtype=np.int64)
+        self.active = np.zeros((n_rules, 0), dtype=bool)
+        self.serial = np.zeros((n_rules, 0), dtype=np.int64)
+        self.pending = np.zeros(0, dtype=bool)
+        self.critical_rules = np.zeros(0, dtype=np.int64)
+        self.row_subject = np.zeros(0, dtype=np.int64)
+        self.row_flags = np.zeros(0, dtype=np.uint32)
+        self.row_risk = np.zeros(0, dtype=np.int8)
+        self.counts = np.zeros(len(SEVERITIES), dtype=np.int64)
+        self.alerting = 0
+        self.raised_total = 0
+        self._recent = {severity: deque(maxlen=RECENT_ALERTS) for severity in SEVERITIES}
+        self.token = None
+        self.seq = 0
+        self.oldest = 0
+        self.updated_at = None
+
+    def _flags(self, frame):
+        flags = np.zeros(len(frame), dtype=np.uint32)
+        for bit, i in enumerate(self.thresholds):
+            rule = self.rules[i]
+            if rule['column'] in frame:
+                values = frame[rule['column']].to_numpy(dtype='float64', na_value=np.nan)
+                flags |= OPS[rule['op']](values, rule['value']).astype(np.uint32) << np.uint32(bit)
+        return flags
+
+    def _risk(self, frame):
+        if 'Risk_Score' not in frame:
+            return np.full(len(frame), -1, dtype=np.int8)
+        score = frame['Risk_Score'].to_numpy(dtype='float64', na_value=np.nan)
+        return np.nan_to_num(score - 1, nan=-1).astype(np.int8)
+
+    def _subjects_for(self, frame):
+        """Subject codes for rows, registering (series, Year) pairs not seen before."""
+        series = frame[self.series].astype(object).to_numpy() if self.series else np.full(len(frame), 'All', dtype=object)
+        keys = pd.MultiIndex.from_arrays([series, frame['Year'].to_numpy(dtype='float64', na_value=np.nan)])
+        codes = self.subjects.get_indexer(keys) if len(self.subjects) else np.full(len(keys), -1)
+        unseen = codes < 0
+        if unseen.any():
+            added = keys[unseen].unique()
+            first = len(self.subjects)
+            self.subjects = self.subjects.append(added)
+            self._grow_subjects(len(added))
+            codes[unseen] = first + added.get_indexer(keys[unseen])
+        return codes.astype(np.int64)
+
+    def _grow_subjects(self, n):
+        def grow(values, fill=0):
+            return np.concatenate([values, np.full(values.shape[:-1] + (n,), fill, dtype=values.dtype)], axis=-1)
+        self.breach, self.levels, self.streak = grow(self.breach), grow(self.levels), grow(self.streak)
+        self.active, self.serial, self.pending = grow(self.active, False), grow(self.serial), grow(self.pending, False)
+        self.critical_rules = grow(self.critical_rules)
+        # -2 marks a subject not evaluated yet, so its first state is a baseline rather than a change
+        self.level = grow(self.level, -2)
+
+    def _apply(self, subjects, flags, risk, sign):
+        n_subjects = len(self.subjects)
+        for bit in range(len(self.thresholds)):
+            hit = ((flags >> np.uint32(bit)) & 1).astype(bool)
+            self.breach[bit] += sign * np.bincount(subjects[hit], minlength=n_subjects)
+        known = risk >= 0
+        cells = risk[known].astype(np.int64) * n_subjects + subjects[known]
+        self.levels += sign * np.bincount(cells, minlength=N_LEVELS * n_subjects).reshape(N_LEVELS, n_subjects)
+
+    def _evaluate(self, touched):
+        candidates = np.union1d(touched, np.flatnonzero(self.pending))
+        if not len(candidates):
+            return
+        first_seen = self.level[candidates] == -2
+        old = self.active[:, candidates]
+        new = old.copy()
+
+        breach = self.breach[:, candidates] > 0
+        debounce = self.debounce[:, None]
+        streak = np.where(breach, np.where(first_seen, debounce, self.streak[:, candidates] + 1), 0)
+        self.streak[:, candidates] = streak
+        new[self.thresholds] = streak >= debounce
+        self.pending[candidates] = (breach & ~new[self.thresholds]).any(axis=0)
+
+        present = self.levels[:, candidates] > 0
+        level = np.where(present.any(axis=0), N_LEVELS - 1 - np.argmax(present[::-1], axis=0), -1).astype(np.int8)
+        previous = self.level[candidates]
+        for i in self.escalations:
+            target = RISK_MAPPING[self.rules[i]['value']] - 1
+            rose = ~first_seen & (previous < target) & (level == target)
+            new[i] = (level == target) & (rose | old[i])
+        self.level[candidates] = level
+
+        raised, cleared = new & ~old, old & ~new
+        if not (raised.any() or cleared.any()):
+            return
+        self.active[:, candidates] = new
+        critical = self.severity == SEVERITIES.index('critical')
+        before = self.critical_rules[candidates] > 0
+        self.critical_rules[candidates] += raised[critical].sum(axis=0) - cleared[critical].sum(axis=0)
+        self.alerting += int((self.critical_rules[candidates] > 0).sum() - before.sum())
+        self.counts += np.bincount(self.severity, weights=raised.sum(axis=1) - cleared.sum(axis=1),
+                                   minlength=len(SEVERITIES)).astype(np.int64)
+
+        # Raises in subject order; the deques keep only the newest few per severity
+        subject_pos, rule = np.nonzero(raised.T)
+        subject = candidates[subject_pos]
+        serial = self.raised_total + np.arange(len(rule))
+        self.serial[rule, subject] = serial
+        self.raised_total += len(rule)
+        for s, severity in enumerate(SEVERITIES):
+            mine = self.severity[rule] == s
+            self._recent[severity].extend(zip(rule[mine][-RECENT_ALERTS:].tolist(), subject[mine][-RECENT_ALERTS:].tolist(),
+                                             serial[mine][-RECENT_ALERTS:].tolist()))
+
+    def sync(self, df, token=None):
+        """Bring the state up to ``df``; rows are matched by position and keep their series and Year.
+
+        A frame already applied under the same ``token`` is ignored, so every
+        session can call this on each rerun.
+        """
+        with self._lock:
+            if token is not None and token == self.token:
+                return False
+            if len(df) < len(self.row_subject):
+                self._reset()
+            flags, risk = self._flags(df), self._risk(df)
+            n_old = len(self.row_subject)
+            # Existing rows: only the ones whose rule flags or risk level moved
+            rows = np.flatnonzero((flags[:n_old] != self.row_flags) | (risk[:n_old] != self.row_risk))
+            subjects = self.row_subject[rows]
+            self._apply(subjects, self.row_flags[rows], self.row_risk[rows], -1)
+            self._apply(subjects, flags[rows], risk[rows], 1)
+            self.row_flags[rows], self.row_risk[rows] = flags[rows], risk[rows]
+            touched = [subjects]
+            if len(df) > n_old:
+                added = self._subjects_for(df.iloc[n_old:])
+                self._apply(added, flags[n_old:], risk[n_old:], 1)
+                self.row_subject = np.concatenate([self.row_subject, added])
+                self.row_flags = np.concatenate([self.row_flags, flags[n_old:]])
+                self.row_risk = np.concatenate([self.row_risk, risk[n_old:]])
+                touched.append(added)
+            self._evaluate(np.unique(np.concatenate(touched)))
+            self.token = token
+            self.updated_at = time.time()
+            return True
+
+    def follow(self, buffer, end=None):
+        """Fold in RingBuffer rows up to ``end`` and drop the ones it has overwritten since."""
+        with self._lock:
+            if not len(self.row_subject):
+                self.row_subject = np.zeros(buffer.capacity, dtype=np.int64)
+                self.row_flags = np.zeros(buffer.capacity, dtype=np.uint32)
+                self.row_risk = np.full(buffer.capacity, -1, dtype=np.int8)
+            new, start = buffer.since(self.seq, end)
+            advanced = start + len(new)
+            if advanced <= self.seq:
+                return False
+            touched = []
+            oldest = max(advanced - buffer.capacity, 0)
+            if oldest > self.oldest:
+                slots = np.arange(self.oldest, min(oldest, self.seq)) % buffer.capacity
+                subjects = self.row_subject[slots]
+                self._apply(subjects, self.row_flags[slots], self.row_risk[slots], -1)
+                touched.append(subjects)
+                self.oldest = oldest
+            slots = np.arange(start, advanced) % buffer.capacity
+            subjects, flags, risk = self._subjects_for(new), self._flags(new), self._risk(new)
+            self._apply(subjects, flags, risk, 1)
+            self.row_subject[slots], self.row_flags[slots], self.row_risk[slots] = subjects, flags, risk
+            touched.append(subjects)
+            self._evaluate(np.unique(np.concatenate(touched)))
+            self.seq = advanced
+            self.updated_at = time.time()
+            return True
+
+    def summary(self):
+        """Active alert counts and health (share of subjects without a critical alert)."""
+        with self._lock:
+            n_subjects = len(self.subjects)
+            return {
+                'active': int(self.counts.sum()),
+                **{severity: int(count) for severity, count in zip(SEVERITIES, self.counts)},
+                'health': 100.0 * (1 - self.alerting / n_subjects) if n_subjects else 100.0,
+                'raised_total': self.raised_total,
+                'updated_at': self.updated_at,
+            }
+
+    def _in_view(self, years=None, risk_levels=None):
+        """Subjects inside a Year range (bounds may be None) holding rows of any of ``risk_levels``."""
+        keep = np.ones(len(self.subjects), dtype=bool)
+        if years is not None:
+            year = self.subjects.get_level_values(1).to_numpy()
+            if years[0] is not None:
+                keep &= year >= years[0]
+            if years[1] is not None:
+                keep &= year <= years[1]
+        if risk_levels is not None:
+            codes = [RISK_MAPPING[level] - 1 for level in risk_levels if level in RISK_MAPPING]
+            keep &= (self.levels[codes] > 0).any(axis=0)
+        return keep
+
+    def count(self, severity='critical', years=None, risk_levels=None):
+        """Active alerts of ``severity`` on the subjects inside the given filters."""
+        with self._lock:
+            rules = self.severity == SEVERITIES.index(severity)
+            return int(self.active[rules][:, self._in_view(years, risk_levels)].sum())
+
+    def recent(self, severity='critical', limit=50, years=None, risk_levels=None):
+        """The newest ``limit`` raises of ``severity`` that are still active, oldest first.
+
+        ``years`` and ``risk_levels`` restrict them to subjects inside the
+        sidebar filters, as in ``count``.
+        """
+        with self._lock:
+            keep = self._in_view(years, risk_levels)
+            alerts = []
+            for rule, subject, serial in reversed(self._recent[severity]):
+                if self.active[rule, subject] and self.serial[rule, subject] == serial and keep[subject]:
+                    series, year = self.subjects[subject]
+                    alerts.append({'rule': self.names[rule], 'label': self.rules[rule]['label'],
+                                   'series': None if self.series is None else series,
+                                   'year': None if np.isnan(year) else int(year)})
+                    if len(alerts) == limit:
+                        break
+            return alerts[::-1]
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from forecast import _series_codes, observed_mask, series_sums, solve
+
+# =========================
+# WALK-FORWARD BACKTEST
+# =========================
+# For every cutoff year the batched linear forecast is refitted on observed
+# rows up to and including the cutoff (expanding window) and scored on the
+# observed rows of the next ``horizon`` years. Rows are sorted by year once,
+# so the training sums grow by one year's slice per cutoff and each cutoff's
+# test rows are a contiguous slice; scoring of the slices is spread across a
+# process pool on large frames.
+POOL_MIN_ROWS = 10_000_000
+COLUMNS = ['cutoff', 'horizon', 'n', 'n_nonzero', 'mae', 'mape', 'bias']
+
+
+def _score(args):
+    cutoff, slope, intercept, codes, step, x, y = args
+    error = intercept[codes] + slope[codes] * x - y
+    nonzero = y != 0
+    rows = []
+    for h in np.unique(step):
+        at = step == h
+        e, a, nz = error[at], y[at], nonzero[at]
+        rows.append({
+            'cutoff': int(cutoff),
+            'horizon': int(h),
+            'n': int(at.sum()),
+            'n_nonzero': int(nz.sum()),
+            'mae': float(np.abs(e).mean()),
+            'mape': float(np.abs(e[nz] / a[nz]).mean() * 100) if nz.any() else np.nan,
+            'bias': float(e.mean()),
+        })
+    # Per-series absolute error sums so the caller can rank series without the rows
+    series_abs = np.bincount(codes, weights=np.abs(error), minlength=len(slope))
+    series_n = np.bincount(codes, minlength=len(slope))
+    return rows, series_abs, series_n
+
+
+def walk_forward(df, series=None, horizon=1, min_train_years=3, target='ProductionGap', workers=None):
+    """Walk-forward, expanding-window scores of the linear forecast.
+
+    Returns ``(by_cutoff, by_series)``: MAE/MAPE/bias per (cutoff, horizon),
+    and MAE per series over every cutoff. MAPE skips zero actuals;
+    ``n_nonzero`` counts the rows it is taken over.
+    """
+    codes, labels = _series_codes(df, series)
+    year = df['Year'].to_numpy(dtype='float64')
+    observed = np.flatnonzero(observed_mask(df, target) & ~np.isnan(year))
+    observed = observed[np.argsort(year[observed], kind='stable')]
+    codes, year = codes[observed], year[observed]
+    y = df[target].to_numpy(dtype='float64')[observed]
+    years, starts = np.unique(year, return_index=True)
+    bounds = np.append(starts, len(year))
+    if len(years) <= min_train_years:
+        return pd.DataFrame(columns=COLUMNS), pd.DataFrame(columns=['series', 'n', 'mae'])
+
+    x = year - float(years.mean())
+    n_series = len(labels)
+    sums = np.zeros((5, n_series))
+    tasks = []
+    for i, cutoff in enumerate(years[:-1]):
+        lo, hi = bounds[i], bounds[i + 1]
+        sums += series_sums(codes[lo:hi], x[lo:hi], y[lo:hi], n_series)
+        if i + 1 < min_train_years:
+            continue
+        slope, intercept, n_obs = solve(sums)
+        end = bounds[np.searchsorted(years, cutoff + horizon, side='right')]
+        test = slice(hi, end)
+        fitted = n_obs[codes[test]] > 0
+        tasks.append((cutoff, slope, intercept, codes[test][fitted], (year[test] - cutoff)[fitted],
+                      x[test][fitted], y[test][fitted]))
+
+    workers = workers or min(os.cpu_count() or 1, len(tasks))
+    if workers <= 1 or len(year) < POOL_MIN_ROWS:
+        results = [_score(task) for task in tasks]
+    else:
+        # Same start method as the other pools; see scenarios.simulate
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+            results = list(pool.map(_score, tasks))
+
+    by_cutoff = pd.DataFrame([row for rows, _, _ in results for row in rows], columns=COLUMNS)
+    series_abs = sum(r[1] for r in results)
+    series_n = sum(r[2] for r in results)
+    scored = series_n > 0
+    by_series = pd.DataFrame({'series': labels[scored], 'n': series_n[scored], 'mae': series_abs[scored] / series_n[scored]})
+    return by_cutoff, by_series.sort_values('mae', ascending=False, ignore_index=True)
+
+
+def summarize(by_cutoff):
+    """Row-weighted MAE/bias and non-zero-actual-weighted MAPE per horizon across all cutoffs."""
+    if by_cutoff.empty:
+        return by_cutoff
+    weights = by_cutoff['n']
+    # Cutoffs without a non-zero actual have no MAPE and carry no weight in it
+    mape_weights = by_cutoff['n_nonzero'].where(by_cutoff['mape'].notna(), 0)
+    grouped = by_cutoff.assign(mae=by_cutoff['mae'] * weights, bias=by_cutoff['bias'] * weights,
+                               mape=by_cutoff['mape'].fillna(0) * mape_weights, n_nonzero=mape_weights).groupby('horizon')
+    out = grouped[['n', 'n_nonzero', 'mae', 'mape', 'bias']].sum()
+    out[['mae', 'bias']] = out[['mae', 'bias']].div(out['n'], axis=0)
+    out['mape'] = out['mape'] / out['n_nonzero'].where(out['n_nonzero'] > 0)
+    return out.reset_index()
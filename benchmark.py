@@ -0,0 +1,255 @@
+"""Rerun-latency benchmarks for streamlit_app.py on synthetic datasets.
+
+    python benchmark.py --rows 1000 100000 1000000 --out bench.json
+    python benchmark.py --compare old.json new.json
+
+Each dataset size runs headlessly through Streamlit's AppTest harness in its
+own process (so peak RSS is per size), with a fresh mmap cache directory so
+the first load is cold.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_loader import DTYPES
+
+APP = Path(__file__).with_name("streamlit_app.py")
+CHUNK_ROWS = 1_000_000
+FIRST_YEAR, LAST_YEAR, LAST_ACTUAL_YEAR = 2010, 2029, 2025
+
+# =========================
+# SYNTHETIC DATA
+# =========================
+def synthetic_chunk(n_rows, rng, n_suppliers=0):
+    """Rows in the embedded dataset's schema, with zero output for future planning years."""
+    year = rng.integers(FIRST_YEAR, LAST_YEAR + 1, n_rows)
+    future = year > LAST_ACTUAL_YEAR
+    planned = rng.integers(200, 1200, n_rows)
+    actual = np.where(future, 0, (planned * rng.uniform(0.6, 1.05, n_rows)).astype(np.int64))
+    orders = rng.integers(100, 1500, n_rows)
+    backlog = rng.integers(0, 5000, n_rows)
+    gap = np.where(future, 0, planned - actual)
+    trend = 8.0 * (year - FIRST_YEAR)
+    predicted = np.maximum(trend + 0.15 * orders + rng.normal(0, 60, n_rows), 0).round(1)
+    chunk = {
+        'Year': year,
+        'PlannedOutput': planned,
+        'ActualOutput': actual,
+        'Orders': orders,
+        'Backlog': backlog,
+        'ProductionGap': gap,
+        'Backlog_Change_Pct': rng.normal(0.05, 0.2, n_rows).round(3),
+        'NetLoss': np.where(future, 0.0, -gap * rng.uniform(0.5, 2.0, n_rows)).round(1),
+        'ForwardLosses': (-predicted * rng.uniform(0.1, 0.5, n_rows)).round(1),
+        'ExcessCapacityCost': rng.uniform(0, 300, n_rows).round(1),
+        'Risk_Level': np.where(predicted > 300, 'High', np.where(predicted > 100, 'Medium', 'Low')),
+        'Predicted_Gap': predicted,
+    }
+    chunk = pd.DataFrame(chunk).astype(DTYPES)
+    if n_suppliers:
+        chunk.insert(0, 'Supplier', pd.Series(rng.integers(0, n_suppliers, n_rows)).map('S{:05d}'.format))
+    return chunk
+
+
+def write_dataset(path, n_rows, seed=0, n_suppliers=0):
+    """Write ``n_rows`` synthetic rows to Parquet in bounded-memory chunks."""
+    rng = np.random.default_rng(seed)
+    tmp = Path(f"{path}.{os.getpid()}.tmp")
+    writer = None
+    try:
+        for start in range(0, n_rows, CHUNK_ROWS):
+            table = pa.Table.from_pandas(synthetic_chunk(min(CHUNK_ROWS, n_rows - start), rng, n_suppliers),
+                                         preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, path)
+    return path
+
+
+# =========================
+# SCRIPTED INTERACTIONS
+# =========================
+def _peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _narrow(slider):
+    lo, hi = slider.min, slider.max
+    step = max((hi - lo) // 4, slider.step or 1)
+    return (lo + step, hi - step) if hi - lo > 2 * step else (lo, hi)
+
+
+def _chart_type(at):
+    # The chart type radio has no key; it is the only one with this label
+    return next(radio for radio in at.radio if radio.label == "Chart Type:")
+
+
+def _interactions(at):
+    """(name, action) pairs applied in order; each is followed by one timed rerun."""
+    steps = [
+        ("year_filter", lambda: at.slider(key="year_filter").set_value(_narrow(at.slider(key="year_filter")))),
+        ("gap_filter", lambda: at.slider(key="gap_filter").set_value(
+            (at.slider(key="gap_filter").min + at.slider(key="gap_filter").max) // 2)),
+        ("order_filter", lambda: at.slider(key="order_filter").set_value(_narrow(at.slider(key="order_filter")))),
+        ("chart_type:Area Chart", lambda: _chart_type(at).set_value("Area Chart")),
+        ("chart_type:Bar Chart", lambda: _chart_type(at).set_value("Bar Chart")),
+    ]
+    for label in [tab.label for tab in at.tabs][1:] + [at.tabs[0].label]:
+        steps.append((f"tab:{label}", lambda label=label: at.session_state.__setitem__("analysis_tab", label)))
+    steps.append(("data_table:open", lambda: at.session_state.__setitem__("data_table", True)))
+    steps.append(("data_table:next_page", lambda: at.number_input(key="table_page").increment()))
+    if any(slider.key == "load_years" for slider in at.slider):
+        # Last: reloading a narrower year window resets the filters above
+        steps.append(("load_years", lambda: at.slider(key="load_years").set_value(_narrow(at.slider(key="load_years")))))
+    return steps
+
+
+def run_app(dataset, timeout=600):
+    """Cold load, per-interaction rerun latency and RSS for one dataset, in this process."""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["OVERSIGHT_DATASET"] = str(dataset)
+    os.environ.setdefault("OVERSIGHT_CACHE_DIR", tempfile.mkdtemp(prefix="oversight-bench-"))
+    result = {'dataset': str(dataset), 'interactions': []}
+
+    at = AppTest.from_file(str(APP), default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    result['cold_load_s'] = time.perf_counter() - start
+    result['cold_load_rss_bytes'] = _peak_rss()
+    if at.exception:
+        result['error'] = [e.value for e in at.exception]
+        return result
+
+    for name, action in _interactions(at):
+        try:
+            action()
+        except (KeyError, StopIteration, ValueError) as e:
+            result['interactions'].append({'name': name, 'skipped': str(e)})
+            continue
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        entry = {'name': name, 'seconds': elapsed, 'peak_rss_bytes': _peak_rss()}
+        if at.exception:
+            entry['error'] = [e.value for e in at.exception]
+        result['interactions'].append(entry)
+
+    # A second session served from the process-wide caches
+    start = time.perf_counter()
+    AppTest.from_file(str(APP), default_timeout=timeout).run()
+    result['warm_load_s'] = time.perf_counter() - start
+    result['peak_rss_bytes'] = _peak_rss()
+    return result
+
+
+# =========================
+# DRIVER
+# =========================
+def _meta():
+    import streamlit
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP.parent,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'streamlit': streamlit.__version__,
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def benchmark(rows, data_dir, seed=0, n_suppliers=0, timeout=600):
+    runs = []
+    for n_rows in rows:
+        path = Path(data_dir) / f"synthetic_{n_rows}_{seed}_{n_suppliers}.parquet"
+        start = time.perf_counter()
+        if not path.exists():
+            write_dataset(path, n_rows, seed, n_suppliers)
+        generate_s = time.perf_counter() - start
+        with tempfile.TemporaryDirectory(prefix="oversight-bench-") as cache_dir:
+            out = Path(cache_dir) / "result.json"
+            env = dict(os.environ, OVERSIGHT_CACHE_DIR=cache_dir)
+            proc = subprocess.run([sys.executable, __file__, "--child", str(path), str(out), "--timeout", str(timeout)],
+                                  env=env, capture_output=True, text=True)
+            if out.exists():
+                run = json.loads(out.read_text())
+            else:
+                run = {'dataset': str(path), 'error': proc.stderr[-2000:]}
+        run.update(rows=n_rows, file_bytes=path.stat().st_size, generate_s=generate_s)
+        runs.append(run)
+        print(f"{n_rows:>12,} rows  cold {run.get('cold_load_s', float('nan')):7.2f}s  "
+              f"peak {run.get('peak_rss_bytes', 0) / 2**20:8.0f} MB" + ("  ERROR" if 'error' in run else ""))
+    return {'meta': _meta(), 'runs': runs}
+
+
+def compare(old, new):
+    """Print new/old latency ratios for every (rows, step) present in both results."""
+    def timings(result):
+        table = {}
+        for run in result['runs']:
+            table[(run['rows'], 'cold_load')] = run.get('cold_load_s')
+            table[(run['rows'], 'warm_load')] = run.get('warm_load_s')
+            for step in run.get('interactions', []):
+                table[(run['rows'], step['name'])] = step.get('seconds')
+        return table
+
+    before, after = timings(old), timings(new)
+    for key in sorted(before.keys() & after.keys(), key=lambda k: (k[0], k[1])):
+        if before[key] and after[key] is not None:
+            ratio = after[key] / before[key]
+            flag = "  REGRESSION" if ratio > 1.2 else ""
+            print(f"{key[0]:>12,}  {key[1]:<32} {before[key]:8.3f}s → {after[key]:8.3f}s  ({ratio:.2f}×){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--suppliers", type=int, default=0, help="Add a Supplier column with this many series")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=Path(tempfile.gettempdir()) / "oversight-bench",
+                        help="Generated datasets are kept here and reused across runs")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed per rerun")
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--child", nargs=2, metavar=("DATASET", "RESULT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_app(args.child[0], args.timeout)
+        Path(args.child[1]).write_text(json.dumps(result))
+    elif args.compare:
+        compare(*(json.loads(Path(p).read_text()) for p in args.compare))
+    else:
+        Path(args.data_dir).mkdir(parents=True, exist_ok=True)
+        result = benchmark(args.rows, args.data_dir, args.seed, args.suppliers, args.timeout)
+        Path(args.out).write_text(json.dumps(result, indent=2))
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import hashlib
+import os
+import shutil
+import uuid
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# SCHEMA
+# =========================
+DTYPES = {
+    'Year': 'int64',
+    'PlannedOutput': 'int64',
+    'ActualOutput': 'int64',
+    'Orders': 'int64',
+    'Backlog': 'int64',
+    'ProductionGap': 'int64',
+    'Backlog_Change_Pct': 'float64',
+    'NetLoss': 'float64',
+    'ForwardLosses': 'float64',
+    'ExcessCapacityCost': 'float64',
+    'Risk_Level': 'str',
+    'Predicted_Gap': 'float64',
+}
+
+# Integer columns are parsed as float so blank cells load as NaN instead of failing;
+# compact() turns them back into (narrow) integers when every value is whole
+READ_DTYPES = {c: ('float64' if dtype == 'int64' else dtype) for c, dtype in DTYPES.items()}
+
+# Narrow types used when streaming large files; every chunk is cast to the
+# same schema so the spilled row groups line up.
+STREAM_DTYPES = {
+    'Year': 'int16',
+    'PlannedOutput': 'int32',
+    'ActualOutput': 'int32',
+    'Orders': 'int32',
+    'Backlog': 'int32',
+    'ProductionGap': 'int32',
+    'Backlog_Change_Pct': 'float32',
+    'NetLoss': 'float32',
+    'ForwardLosses': 'float32',
+    'ExcessCapacityCost': 'float32',
+    'Risk_Level': 'str',
+    'Predicted_Gap': 'float32',
+}
+
+REQUIRED_COLUMNS = ['Year', 'Orders', 'Predicted_Gap', 'Risk_Level']
+
+# Optional identifiers of a supplier/program series; kept when present
+SERIES_COLUMNS = ['Supplier', 'Program']
+
+RISK_MAPPING = {"Low": 1, "Medium": 2, "High": 3}
+
+# Compact in-memory schema applied by enrich(); columns fall back to their
+# wide type when values do not fit.
+COMPACT_INTS = {
+    'Year': 'int16',
+    'PlannedOutput': 'int32',
+    'ActualOutput': 'int32',
+    'Orders': 'int32',
+    'Backlog': 'int32',
+    'ProductionGap': 'int32',
+}
+MONEY_COLUMNS = ['NetLoss', 'ForwardLosses', 'ExcessCapacityCost']
+# float32 is used for money only while every value stays within half a cent
+MONEY_TOLERANCE = 0.005
+
+SOURCE_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.xlsx': 'xlsx',
+}
+
+SPILL_DIR = Path(os.environ.get("OVERSIGHT_SPILL_DIR", Path(tempfile.gettempdir()) / "digital-oversight"))
+
+
+# =========================
+# LOAD & ENRICH
+# =========================
+def content_hash(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def stream_hash(f, block=1 << 20):
+    """content_hash of a file object, read a block at a time and rewound."""
+    digest = hashlib.blake2b(digest_size=16)
+    f.seek(0)
+    while chunk := f.read(block):
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return content_hash(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+
+def keep_column(name):
+    return name in DTYPES or name in SERIES_COLUMNS
+
+
+def source_format(name):
+    return SOURCE_FORMATS.get(Path(str(name)).suffix.lower(), 'csv')
+
+
+def read_dataset(source, fmt=None, year_range=None):
+    fmt = fmt or source_format(getattr(source, "name", source))
+    if fmt == 'parquet':
+        return read_parquet(source, year_range)
+    if fmt == 'arrow':
+        return read_arrow(source, year_range)
+    if fmt == 'xlsx':
+        return pd.read_excel(source, usecols=keep_column, dtype=READ_DTYPES)
+    return pd.read_csv(source, dtype=READ_DTYPES)
+
+
+def read_parquet(path, year_range=None):
+    """Read a Parquet file with column projection and Year predicates pushed down.
+
+    Row groups whose Year statistics fall outside ``year_range`` are never read.
+    """
+    import pyarrow.parquet as pq
+
+    columns = [c for c in pq.read_schema(path).names if keep_column(c)]
+    filters = [('Year', '>=', year_range[0]), ('Year', '<=', year_range[1])] if year_range else None
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True).to_pandas()
+
+
+def parquet_year_bounds(path):
+    import pyarrow.parquet as pq
+
+    meta = pq.ParquetFile(path).metadata
+    col = meta.schema.to_arrow_schema().get_field_index('Year')
+    if col < 0:
+        return None
+    stats = [meta.row_group(i).column(col).statistics for i in range(meta.num_row_groups)]
+    stats = [s for s in stats if s is not None and s.has_min_max]
+    if not stats:
+        return None
+    return int(min(s.min for s in stats)), int(max(s.max for s in stats))
+
+
+def read_arrow(path, year_range=None):
+    """Memory-map an Arrow IPC / Feather file.
+
+    Numeric columns are handed to pandas without copying, so opening is
+    dominated by the page cache rather than parsing.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    source = pa.memory_map(str(path), 'r')
+    try:
+        table = pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        source.seek(0)
+        table = pa.ipc.open_stream(source).read_all()
+    table = table.select([c for c in table.column_names if keep_column(c)])
+    if year_range:
+        year = table['Year']
+        table = table.filter(pc.and_(pc.greater_equal(year, year_range[0]), pc.less_equal(year, year_range[1])))
+    return table.to_pandas(split_blocks=True)
+
+
+def persist_upload(f, dataset_hash, suffix):
+    """Copy an uploaded binary file under SPILL_DIR so it can be memory-mapped."""
+    path = SPILL_DIR / f"{dataset_hash}{suffix}"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = partial_path(path)
+        f.seek(0)
+        try:
+            with open(tmp, 'wb') as out:
+                shutil.copyfileobj(f, out, 1 << 20)
+            tmp.replace(path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        f.seek(0)
+    return path
+
+
+def risk_dtype(levels=()):
+    """Ordered Low < Medium < High categorical; unknown levels sort after High."""
+    extra = sorted(set(levels) - set(RISK_MAPPING))
+    return pd.CategoricalDtype(list(RISK_MAPPING) + extra, ordered=True)
+
+
+def compact(df):
+    """Narrow numeric columns and store Risk_Level as an ordered categorical."""
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if col in COMPACT_INTS and values.dtype.kind == 'f' and len(values):
+            whole = values.to_numpy()
+            if (np.abs(whole) < 2**53).all() and (whole == np.round(whole)).all():
+                values = values.astype('int64')
+        if col in COMPACT_INTS and pd.api.types.is_integer_dtype(values.dtype) and len(values):
+            info = np.iinfo(COMPACT_INTS[col])
+            if info.min <= values.min() and values.max() <= info.max:
+                values = values.astype(COMPACT_INTS[col])
+        elif col in MONEY_COLUMNS and values.dtype == 'float64':
+            narrow = values.astype('float32')
+            error = np.abs(narrow.to_numpy(dtype='float64') - values.to_numpy())
+            if not (error > MONEY_TOLERANCE).any():
+                values = narrow
+        elif col == 'Risk_Level':
+            # Categoricals from Parquet/Feather carry their own (usually alphabetical) order; recast by label
+            values = values.astype(risk_dtype(values.dropna().unique()))
+        elif col in SERIES_COLUMNS and not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        out[col] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+def risk_score(risk_level):
+    # Scored by label, so the result does not depend on the category order
+    lookup = np.array([RISK_MAPPING.get(c, 0) for c in risk_level.cat.categories] + [0], dtype='int8')
+    score = pd.Series(lookup[risk_level.cat.codes.to_numpy()], index=risk_level.index)
+    known = score > 0
+    return score if known.all() else score.where(known)
+
+
+def enrich(df):
+    df = compact(df)
+    df["Risk_Score"] = risk_score(df["Risk_Level"])
+    return df
+
+
+def memory_report(df):
+    """Bytes per column as loaded (wide schema) and after compaction."""
+    rows = []
+    for col in df.columns:
+        after = int(df[col].memory_usage(index=False, deep=True))
+        if col == 'Risk_Level' or col in SERIES_COLUMNS:
+            wide = df[col].astype('str')
+        elif col == 'Risk_Score':
+            wide = df[col].astype('float64' if df[col].isna().any() else 'int64')
+        else:
+            # Integer columns with blanks stay float64 when loaded
+            wide = df[col].astype('float64' if df[col].dtype.kind == 'f' else DTYPES.get(col, df[col].dtype))
+        before = int(wide.memory_usage(index=False, deep=True))
+        rows.append({'column': col, 'dtype': str(df[col].dtype), 'before': before, 'after': after})
+    report = pd.DataFrame(rows)
+    report['ratio'] = report['before'] / report['after'].clip(lower=1)
+    return report
+
+
+# =========================
+# STREAMING INGESTION
+# =========================
+def spill_path(dataset_hash):
+    return SPILL_DIR / f"{dataset_hash}.parquet"
+
+
+def partial_path(dest):
+    # Sessions are threads of one process, so a per-PID name would still collide
+    return dest.with_name(f"{dest.name}.{uuid.uuid4().hex}.partial")
+
+
+def prepare_chunk(chunk):
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    valid = chunk[REQUIRED_COLUMNS].notna().all(axis=1) & chunk["Risk_Level"].isin(list(RISK_MAPPING))
+    # Every chunk shares one narrow schema, so rows that would overflow it are rejected rather than wrapped
+    for col, dtype in STREAM_DTYPES.items():
+        if col in chunk.columns and np.dtype(dtype).kind == 'i':
+            info = np.iinfo(dtype)
+            values = chunk[col]
+            valid &= values.isna() | values.between(info.min, info.max)
+    chunk = chunk[valid]
+    numeric = [c for c in chunk.columns if c in STREAM_DTYPES and c != "Risk_Level"]
+    chunk = chunk.fillna({c: 0 for c in numeric})
+    return chunk.astype({c: STREAM_DTYPES.get(c, 'str') for c in chunk.columns}), int((~valid).sum())
+
+
+def ingest_csv(source, dest, size=None, chunksize=250_000, progress=None):
+    """Stream a CSV into a Parquet file one chunk at a time.
+
+    Only dashboard columns are parsed and at most one chunk is held in memory.
+    Each chunk is written as one row group per Year, so ``read_parquet`` can
+    skip the years outside a range; rows keep their order within a Year.
+    Returns ``(rows_written, rows_dropped)``.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = partial_path(dest)
+    # Numeric columns are parsed as float so missing values survive until validation
+    parse_dtypes = {c: ('str' if c == 'Risk_Level' else 'float64') for c in STREAM_DTYPES}
+    parse_dtypes.update({c: 'str' for c in SERIES_COLUMNS})
+    writer = None
+    rows_written = rows_dropped = 0
+    try:
+        for chunk in pd.read_csv(source, usecols=lambda c: c in parse_dtypes, dtype=parse_dtypes, chunksize=chunksize):
+            chunk, dropped = prepare_chunk(chunk)
+            chunk = chunk.sort_values('Year', kind='stable', ignore_index=True)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            cuts = np.flatnonzero(np.diff(chunk['Year'].to_numpy())) + 1
+            for start, end in zip(np.r_[0, cuts], np.r_[cuts, len(chunk)]):
+                writer.write_table(table.slice(start, end - start))
+            rows_written += len(chunk)
+            rows_dropped += dropped
+            if progress is not None and size:
+                progress(min(source.tell() / size, 1.0), rows_written)
+        if writer is None:
+            raise ValueError("Uploaded file contains no rows")
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    writer.close()
+    tmp.replace(dest)
+    return rows_written, rows_dropped
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# DENSITY BINNING & CORRELATION
+# =========================
+def binned_density(x, y, value, bins=60):
+    """Bin points on a bins x bins grid.
+
+    Returns (x_centers, y_centers, counts, mean_value) with grids indexed
+    [y_bin, x_bin] as Plotly heatmaps expect; empty bins hold NaN means.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    value = np.asarray(value, dtype='float64')
+    keep = np.isfinite(x) & np.isfinite(y) & np.isfinite(value)
+    x, y, value = x[keep], y[keep], value[keep]
+    if not len(x):
+        return np.array([]), np.array([]), np.zeros((0, 0)), np.zeros((0, 0))
+    x_edges = np.linspace(x.min(), x.max() if x.max() > x.min() else x.min() + 1, bins + 1)
+    y_edges = np.linspace(y.min(), y.max() if y.max() > y.min() else y.min() + 1, bins + 1)
+    xi = np.clip(np.searchsorted(x_edges, x, side='right') - 1, 0, bins - 1)
+    yi = np.clip(np.searchsorted(y_edges, y, side='right') - 1, 0, bins - 1)
+    flat = yi * bins + xi
+    counts = np.bincount(flat, minlength=bins * bins).reshape(bins, bins)
+    sums = np.bincount(flat, weights=value, minlength=bins * bins).reshape(bins, bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(counts > 0, sums / counts, np.nan)
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts, mean
+
+
+def correlation_matrix(df):
+    """Pearson correlation across all numeric columns via one centered matrix product."""
+    numeric = df.select_dtypes('number')
+    values = numeric.to_numpy(dtype='float64')
+    values = values[np.isfinite(values).all(axis=1)]
+    if len(values) < 2:
+        return pd.DataFrame(np.nan, index=numeric.columns, columns=numeric.columns)
+    centered = values - values.mean(axis=0)
+    cov = centered.T @ centered
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.outer(std, std)
+    return pd.DataFrame(corr, index=numeric.columns, columns=numeric.columns)
@@ -0,0 +1,54 @@
+import numpy as np
+
+# =========================
+# SERVER-SIDE DOWNSAMPLING
+# =========================
+def _sorted_finite(x, y):
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y = x[keep], y[keep]
+    order = np.argsort(x, kind='stable')
+    return x[order], y[order]
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: keep the ``n_out`` points that best preserve the line's shape."""
+    x, y = _sorted_finite(x, y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    # Interior points are split into n_out - 2 buckets; first and last are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def minmax(x, y, n_out):
+    """Keep the min and max point of each of ``n_out // 2`` equal-count buckets."""
+    x, y = _sorted_finite(x, y)
+    n = len(x)
+    buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return x, y
+    size = -(-n // buckets)
+    # Pad to a (buckets, size) grid so argmin/argmax run per row in one call
+    grid = np.full(buckets * size, np.nan)
+    grid[:n] = y
+    grid = grid.reshape(buckets, size)
+    valid = ~np.isnan(grid).all(axis=1)
+    rows = np.flatnonzero(valid)
+    lows = rows * size + np.nanargmin(grid[valid], axis=1)
+    highs = rows * size + np.nanargmax(grid[valid], axis=1)
+    keep = np.unique(np.r_[lows, highs])
+    return x[keep], y[keep]
@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+
+# =========================
+# FIGURE CACHE
+# =========================
+class FigureCache:
+    """Byte-bounded LRU of built Plotly figures.
+
+    Keys are tuples such as (dataset hash, filter tuple, chart name, options).
+    Values are ``go.Figure`` objects, sized by their ``plotly.io.to_json``
+    spec. A hit skips trace construction and validation; ``st.plotly_chart``
+    still copies and serializes the figure on every render, so callers must
+    treat it as read-only.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, figure, size):
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (figure, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def discard(self, match):
+        """Drop every entry whose key satisfies ``match``; returns how many were dropped."""
+        with self._lock:
+            stale = [key for key in self._entries if match(key)]
+            for key in stale:
+                self.bytes -= self._entries.pop(key)[1]
+            return len(stale)
+
+    def get_or_build(self, key, build):
+        figure = self.get(key)
+        if figure is None:
+            import plotly.io as pio
+
+            figure = build()
+            self.put(key, figure, len(pio.to_json(figure, validate=False)))
+        return figure
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
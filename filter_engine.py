@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# INDEXED FILTER ENGINE
+# =========================
+RANGE_COLUMNS = ['Year', 'Orders', 'Predicted_Gap']
+
+
+def changed_rows(old, new):
+    """Positions where two aligned arrays differ, treating NaN as equal to NaN."""
+    diff = old != new
+    if old.dtype.kind == 'f' or new.dtype.kind == 'f':
+        diff &= ~(np.isnan(old.astype('float64')) & np.isnan(new.astype('float64')))
+    return np.flatnonzero(diff)
+
+
+def patch_sorted(values, order, values_sorted, rows):
+    """Re-sort after ``values[rows]`` changed: drop those rows, then merge them back in.
+
+    Costs O(n) memory moves plus a sort of the changed rows only.
+    """
+    moved = np.zeros(len(values), dtype=bool)
+    moved[rows] = True
+    keep = ~moved[order]
+    order, values_sorted = order[keep], values_sorted[keep]
+    new_order = rows[np.argsort(values[rows], kind='stable')]
+    new_sorted = values[new_order]
+    at = np.searchsorted(values_sorted, new_sorted, side='right')
+    return np.insert(order, at, new_order), np.insert(values_sorted, at, new_sorted)
+
+
+class FilterIndex:
+    """Sorted indexes for the range filters plus packed bitmaps for Risk_Level.
+
+    Built once per dataset. A query starts from the most selective predicate
+    and probes the others only at the surviving positions, so a slider change
+    costs O(matches) instead of a full scan of every column.
+    """
+
+    def __init__(self, df):
+        self.n = len(df)
+        self.sorted = {}
+        for col in RANGE_COLUMNS:
+            values = df[col].to_numpy()
+            order = np.argsort(values)
+            self.sorted[col] = (values, order, values[order])
+        codes, levels = pd.factorize(df['Risk_Level'])
+        self.bitmaps = {level: np.packbits(codes == i) for i, level in enumerate(levels)}
+        # Rows without a level match no risk selection, so "every level" is not "no filter"
+        self.missing_risk = bool((codes < 0).any())
+
+    def with_risk_levels(self, risk_level):
+        """Copy sharing the sorted range indexes, with bitmaps rebuilt for new Risk_Level labels."""
+        index = self.__class__.__new__(self.__class__)
+        index.n = self.n
+        index.sorted = self.sorted
+        codes, levels = pd.factorize(risk_level)
+        index.bitmaps = {level: np.packbits(codes == i) for i, level in enumerate(levels)}
+        index.missing_risk = bool((codes < 0).any())
+        return index
+
+    def refreshed(self, df):
+        """Index for an updated version of the frame.
+
+        Range indexes whose column is unchanged are shared; changed rows are
+        merged into the others. Risk bitmaps are rebuilt, which is one pass.
+        """
+        if len(df) != self.n:
+            return self.__class__(df)
+        index = self.__class__.__new__(self.__class__)
+        index.n = self.n
+        index.sorted = {}
+        for col in RANGE_COLUMNS:
+            old_values, order, values_sorted = self.sorted[col]
+            values = df[col].to_numpy()
+            rows = changed_rows(old_values, values)
+            if len(rows) > self.n // 8:
+                order = np.argsort(values)
+                values_sorted = values[order]
+            elif len(rows):
+                order, values_sorted = patch_sorted(values, order, values_sorted, rows)
+            index.sorted[col] = (values, order, values_sorted)
+        return index.with_risk_levels(df['Risk_Level'])
+
+    def arrays(self):
+        """Index arrays by name, for persisting; the raw column values come from the frame."""
+        out = {}
+        for col, (_, order, values_sorted) in self.sorted.items():
+            out[f'{col}:order'] = order
+            out[f'{col}:sorted'] = values_sorted
+        for level, packed in self.bitmaps.items():
+            out[f'risk:{level}'] = packed
+        return out
+
+    @classmethod
+    def from_arrays(cls, df, arrays):
+        index = cls.__new__(cls)
+        index.n = len(df)
+        index.sorted = {col: (df[col].to_numpy(), arrays[f'{col}:order'], arrays[f'{col}:sorted']) for col in RANGE_COLUMNS}
+        index.bitmaps = {name.split(':', 1)[1]: packed for name, packed in arrays.items() if name.startswith('risk:')}
+        index.missing_risk = bool(df['Risk_Level'].isna().any())
+        return index
+
+    def _range(self, col, low, high):
+        _, order, values_sorted = self.sorted[col]
+        lo = np.searchsorted(values_sorted, low, side='left') if low is not None else 0
+        # NaNs sort last and never satisfy a comparison
+        hi = np.searchsorted(values_sorted, high if high is not None else np.inf, side='right')
+        return lo, hi
+
+    def _risk_bitmap(self, risk_levels):
+        packed = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for level in risk_levels:
+            if level in self.bitmaps:
+                packed |= self.bitmaps[level]
+        return packed
+
+    def query(self, year_range, risk_levels, gap_threshold, order_range):
+        """Return sorted row positions matching the sidebar filters, or None for all rows."""
+        ranges = {
+            'Year': self._range('Year', *year_range),
+            'Orders': self._range('Orders', *order_range),
+            'Predicted_Gap': self._range('Predicted_Gap', gap_threshold, None),
+        }
+        bounds = {'Year': year_range, 'Orders': order_range, 'Predicted_Gap': (gap_threshold, None)}
+        active = {col: r for col, r in ranges.items() if r != (0, self.n)}
+        all_risk = not self.missing_risk and set(self.bitmaps) <= set(risk_levels)
+        if not active and all_risk:
+            return None
+
+        if active:
+            col = min(active, key=lambda c: active[c][1] - active[c][0])
+            lo, hi = active.pop(col)
+            candidates = np.sort(self.sorted[col][1][lo:hi])
+        else:
+            candidates = np.flatnonzero(np.unpackbits(self._risk_bitmap(risk_levels), count=self.n))
+            all_risk = True
+
+        for col in active:
+            values = self.sorted[col][0][candidates]
+            low, high = bounds[col]
+            keep = values >= low
+            if high is not None:
+                keep &= values <= high
+            candidates = candidates[keep]
+        if not all_risk:
+            packed = self._risk_bitmap(risk_levels)
+            bits = (packed[candidates >> 3] >> (7 - (candidates & 7))) & 1
+            candidates = candidates[bits.astype(bool)]
+        return candidates
@@ -0,0 +1,252 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_loader import risk_score
+
+# =========================
+# BATCHED LINEAR FORECASTS
+# =========================
+# Every series gets its own ordinary least-squares line Year -> target, the
+# same model as the notebook's LinearRegression. Fits come from per-series
+# sufficient statistics (n, Σx, Σy, Σxx, Σxy) gathered with np.bincount, so
+# thousands of series cost one pass over the rows and no per-series Python
+# objects, and new observations are folded in without a refit.
+SHARD_MIN_SERIES = 50_000
+
+
+def _sums(codes, x, y, n_series):
+    weights = (None, x, y, x * x, x * y)
+    return np.stack([np.bincount(codes, weights=w, minlength=n_series).astype('float64') for w in weights])
+
+
+def _sums_shard(args):
+    return _sums(*args)
+
+
+def series_sums(codes, x, y, n_series, workers=1):
+    """Sufficient statistics, shape (5, n_series), for rows labelled 0..n_series-1.
+
+    With ``workers > 1`` and many series, rows are grouped by series and the
+    groups are summed in a process pool; each shard is an independent set of
+    series so results are concatenated without merging.
+    """
+    if workers <= 1 or n_series < SHARD_MIN_SERIES:
+        return _sums(codes, x, y, n_series)
+    bounds = np.linspace(0, n_series, workers + 1).astype(np.int64)
+    order = np.argsort(codes, kind='stable')
+    codes, x, y = codes[order], x[order], y[order]
+    cuts = np.searchsorted(codes, bounds)
+    shards = [(codes[cuts[i]:cuts[i + 1]] - bounds[i], x[cuts[i]:cuts[i + 1]], y[cuts[i]:cuts[i + 1]],
+               int(bounds[i + 1] - bounds[i])) for i in range(workers)]
+    # Not fork: a forked worker may inherit a lock some server thread was holding
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        parts = list(pool.map(_sums_shard, shards))
+    return np.concatenate(parts, axis=1)
+
+
+def solve(sums):
+    """Closed-form (slope, intercept, n_obs) from sufficient statistics."""
+    n, sx, sy, sxx, sxy = sums
+    denom = n * sxx - sx * sx
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Fewer than two distinct years: flat line through the mean
+        slope = np.where(denom > 1e-9 * np.maximum(n * sxx, 1), (n * sxy - sx * sy) / denom, 0.0)
+        intercept = (sy - slope * sx) / n
+    return slope, intercept, n.astype(np.int64)
+
+
+def observed_mask(df, target='ProductionGap'):
+    """Rows that carry real history: a known target and non-zero actual output.
+
+    Future planning rows are stored with zero output and gap, as in the
+    embedded dataset, so they are excluded from fitting but still forecast.
+    """
+    mask = df[target].notna().to_numpy()
+    if 'ActualOutput' in df:
+        mask = mask & (df['ActualOutput'].to_numpy() != 0)
+    return mask
+
+
+def _series_codes(df, series):
+    if series is None:
+        return np.zeros(len(df), dtype=np.int64), pd.Index(['All'])
+    codes, labels = pd.factorize(df[series], use_na_sentinel=False)
+    return codes.astype(np.int64), pd.Index(np.asarray(labels, dtype=object))
+
+
+def _fits_frame(labels, sums, origin):
+    slope, intercept, n_obs = solve(sums)
+    return pd.DataFrame({'series': labels, 'slope': slope, 'intercept': intercept - slope * origin, 'n_obs': n_obs})
+
+
+def forecast(df, series=None, target='ProductionGap', workers=None):
+    """Fitted Year -> target line evaluated on every row, per series.
+
+    Returns ``(predicted, fits)`` where ``predicted`` is a float64 array aligned
+    with ``df`` and ``fits`` is a DataFrame of slope/intercept/n_obs per series.
+    """
+    codes, labels = _series_codes(df, series)
+    year = df['Year'].to_numpy(dtype='float64')
+    # Centering keeps x * x well conditioned for calendar years
+    origin = float(np.nanmean(year)) if len(year) else 0.0
+    x = year - origin
+    fit_rows = observed_mask(df, target) & ~np.isnan(x)
+    workers = workers or min(os.cpu_count() or 1, 8)
+    sums = series_sums(codes[fit_rows], x[fit_rows], df[target].to_numpy(dtype='float64')[fit_rows], len(labels), workers)
+    slope, intercept, _ = solve(sums)
+    return intercept[codes] + slope[codes] * x, _fits_frame(labels, sums, origin)
+
+
+# =========================
+# INCREMENTAL UPDATES
+# =========================
+class IncrementalForecast:
+    """Forecast frame kept current as new actuals arrive.
+
+    New observations are added to the per-series sums in O(new rows) and only
+    the affected series are re-solved and re-predicted. An observation fills
+    the unobserved placeholder row for its (series, Year) when there is one,
+    otherwise it is appended as a new row. Risk_Level is only ever taken from
+    the actuals as given, like the dataset column it extends; the rules engine
+    reclassifies the whole frame downstream. ``revision`` increases
+    with every applied batch and ``lineage`` is unique per instance, so
+    callers can key caches on both.
+    """
+
+    def __init__(self, df, series=None, target='ProductionGap', workers=None):
+        self.series = series
+        self.target = target
+        self.codes, self.labels = _series_codes(df, series)
+        year = df['Year'].to_numpy(dtype='float64')
+        self.origin = float(np.nanmean(year)) if len(year) else 0.0
+        x = year - self.origin
+        observed = observed_mask(df, target) & ~np.isnan(x)
+        workers = workers or min(os.cpu_count() or 1, 8)
+        self.sums = series_sums(self.codes[observed], x[observed], df[target].to_numpy(dtype='float64')[observed],
+                                len(self.labels), workers)
+        slope, intercept, _ = solve(self.sums)
+        self.frame = df.assign(Predicted_Gap=intercept[self.codes] + slope[self.codes] * x)
+        self.initial_frame = self.frame
+        # (series, Year) -> first unobserved row, for filling placeholders in place
+        open_rows = np.flatnonzero(~observed & ~np.isnan(year))
+        pairs = pd.MultiIndex.from_arrays([self.codes[open_rows], year[open_rows]])
+        first = ~pairs.duplicated()
+        self._open_pairs = pairs[first]
+        self._open_rows = open_rows[first]
+        self._filled = np.zeros(len(self._open_rows), dtype=bool)
+        self.revision = 0
+        self.lineage = uuid.uuid4().hex[:8]
+        self._applied = set()
+        self._lock = threading.Lock()
+
+    def fits(self):
+        with self._lock:
+            return _fits_frame(self.labels, self.sums, self.origin)
+
+    def snapshot(self):
+        with self._lock:
+            return self.frame, self.revision
+
+    def _codes_for(self, new):
+        if self.series is None:
+            return np.zeros(len(new), dtype=np.int64)
+        values = new[self.series].astype(object).to_numpy()
+        added = pd.Index(values).unique().difference(self.labels)
+        if len(added):
+            self.labels = self.labels.append(added)
+            self.sums = np.concatenate([self.sums, np.zeros((5, len(added)))], axis=1)
+        return self.labels.get_indexer(values).astype(np.int64)
+
+    def append(self, new, token=None):
+        """Fold in new actuals: Year, the target and optionally the series and other columns.
+
+        Returns True when the batch changed the forecast. A batch already
+        applied under the same ``token`` is ignored.
+        """
+        with self._lock:
+            if token is not None and token in self._applied:
+                return False
+            if self.series is not None and self.series not in new:
+                raise ValueError(f"New actuals need a '{self.series}' column")
+            new = new[new['Year'].notna() & new[self.target].notna()].reset_index(drop=True)
+            if not len(new):
+                return False
+            codes = self._codes_for(new)
+            year = new['Year'].to_numpy(dtype='float64')
+            y = new[self.target].to_numpy(dtype='float64')
+            x = year - self.origin
+            np.add.at(self.sums.T, codes, np.column_stack([np.ones_like(x), x, y, x * x, x * y]))
+
+            # Each open placeholder takes at most one observation
+            slot = self._open_pairs.get_indexer(pd.MultiIndex.from_arrays([codes, year]))
+            taken = slot >= 0
+            taken[taken] = ~self._filled[slot[taken]]
+            taken &= ~pd.Series(np.where(taken, slot, -1)).duplicated().to_numpy()
+            self._filled[slot[taken]] = True
+            frame = self._fill_rows(self.frame, self._open_rows[slot[taken]], new[taken])
+            if (~taken).any():
+                frame = self._append_rows(frame, new[~taken])
+                self.codes = np.concatenate([self.codes, codes[~taken]])
+
+            # Re-solve and re-predict only the series that received data
+            changed = np.unique(codes)
+            slope, intercept, _ = solve(self.sums[:, changed])
+            rows = np.flatnonzero(np.isin(self.codes, changed))
+            local = np.searchsorted(changed, self.codes[rows])
+            predicted = frame['Predicted_Gap'].to_numpy(dtype='float64', copy=True)
+            predicted[rows] = intercept[local] + slope[local] * (frame['Year'].to_numpy(dtype='float64')[rows] - self.origin)
+            self.frame = frame.assign(Predicted_Gap=predicted)
+            self.revision += 1
+            if token is not None:
+                self._applied.add(token)
+            return True
+
+    def _fill_rows(self, frame, rows, new):
+        if not len(rows):
+            return frame
+        updates = {}
+        for col in new.columns:
+            if col in frame and col not in ('Year', 'Predicted_Gap', 'Risk_Score') and pd.api.types.is_numeric_dtype(frame[col].dtype):
+                values = frame[col].to_numpy(copy=True)
+                values[rows] = new[col].fillna(0).to_numpy(dtype=values.dtype)
+                updates[col] = values
+        if 'Risk_Level' in new and 'Risk_Level' in frame:
+            # Keep the score in step with the label rather than copying both
+            known = new['Risk_Level'].notna().to_numpy()
+            risk_level = frame['Risk_Level'].astype(object).to_numpy(copy=True)
+            risk_level[rows[known]] = new['Risk_Level'].to_numpy(dtype=object)[known]
+            dtype = frame['Risk_Level'].dtype
+            added = pd.Index(risk_level).dropna().unique().difference(dtype.categories)
+            if len(added):
+                dtype = pd.CategoricalDtype(dtype.categories.append(added), ordered=dtype.ordered)
+            updates['Risk_Level'] = pd.Series(risk_level, index=frame.index).astype(dtype)
+            if 'Risk_Score' in frame:
+                updates['Risk_Score'] = risk_score(updates['Risk_Level'])
+        return frame.assign(**updates)
+
+    def _append_rows(self, frame, new):
+        new = new.reset_index(drop=True)
+        extra = {}
+        for col in frame.columns:
+            dtype = frame[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                values = new[col].astype(object) if col in new else pd.Series(np.nan, index=new.index, dtype=object)
+                added = pd.Index(values.dropna().unique()).difference(dtype.categories)
+                if len(added):
+                    dtype = pd.CategoricalDtype(dtype.categories.append(added), ordered=dtype.ordered)
+                    frame = frame.assign(**{col: frame[col].astype(dtype)})
+                extra[col] = values.astype(dtype)
+            elif col in new and col != 'Risk_Score':
+                extra[col] = new[col].fillna(0).astype(dtype) if pd.api.types.is_integer_dtype(dtype) else new[col].astype(dtype)
+            else:
+                extra[col] = pd.Series(0 if pd.api.types.is_integer_dtype(dtype) else np.nan, index=new.index).astype(dtype)
+        frame = pd.concat([frame, pd.DataFrame(extra)], ignore_index=True)
+        if 'Risk_Score' in frame:
+            frame['Risk_Score'] = risk_score(frame['Risk_Level'])
+        return frame
@@ -0,0 +1,209 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import RISK_MAPPING
+
+# =========================
+# PRE-AGGREGATED METRICS CUBE
+# =========================
+BUCKETS = 32
+
+
+def _quantile_buckets(values, buckets):
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, buckets + 1)[1:-1])) if len(values) else np.array([])
+    return np.searchsorted(edges, values, side='right'), len(edges) + 1
+
+
+def level_summary(levels, counts, gaps, total_orders, first_pos):
+    """The filter result dict from per-level sums, shared by the cube, SQL backend and live view.
+
+    ``first_pos`` holds each level's first matching row position; the critical
+    row is the first one holding the highest score, as in Risk_Score.idxmax().
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    count = int(counts.sum())
+    present = counts > 0
+    critical_pos = None
+    if count:
+        level_score = np.array([RISK_MAPPING.get(level, np.nan) for level in levels], dtype='float64')
+        scores = np.where(present, level_score, np.nan)
+        if np.isnan(scores).all():
+            critical_pos = int(first_pos[present].min())
+        else:
+            critical_pos = int(first_pos[scores == np.nanmax(scores)].min())
+
+    risk_counts = pd.Series(counts[present], index=pd.Index(levels[present], name='Risk_Level'),
+                            name='count').sort_values(ascending=False, kind='stable')
+    gap_by_risk = pd.DataFrame({'Risk_Level': levels[present], 'Predicted_Gap': gaps[present]})
+    gap_by_risk = gap_by_risk.sort_values('Risk_Level', ignore_index=True)
+    return {
+        'count': count,
+        'total_gap': float(gaps.sum()),
+        'total_orders': total_orders,
+        'avg_orders': total_orders / count if count else float('nan'),
+        'high_risk_count': int(counts[levels == 'High'].sum()),
+        'risk_counts': risk_counts,
+        'gap_by_risk': gap_by_risk,
+        'critical_pos': critical_pos,
+    }
+
+
+def level_codes(risk_level, categories):
+    """Codes of ``risk_level`` against a growing label Index; -1 marks a missing level."""
+    if isinstance(risk_level.dtype, pd.CategoricalDtype):
+        # Map the categories rather than every row
+        labels = risk_level.cat.categories
+        added = labels.difference(categories)
+        categories = categories.append(added) if len(added) else categories
+        mapping = np.append(categories.get_indexer(labels), -1)
+        return mapping[risk_level.cat.codes.to_numpy()], categories
+    values = risk_level.astype(object).to_numpy()
+    missing = pd.isna(values)
+    added = pd.Index(values[~missing]).unique().difference(categories)
+    categories = categories.append(added) if len(added) else categories
+    codes = categories.get_indexer(values)
+    codes[missing] = -1
+    return codes, categories
+
+
+class MetricsCube:
+    """Year x Orders bucket x Predicted_Gap bucket cells with per-Risk_Level aggregates.
+
+    Each cell holds value ranges and, per risk level, row count, gap and order
+    sums and first row position. A query sums the cells that lie fully inside
+    the filter and rescans only the rows of cells straddling an Orders or gap
+    boundary, so results match the row-level mask exactly. Risk levels are not
+    part of the cell layout, so a reclassified ``risk_level`` passed to
+    ``query`` only re-aggregates the cells holding rows whose level changed.
+    """
+
+    def __init__(self, df):
+        year = df['Year'].to_numpy()
+        orders = df['Orders'].to_numpy()
+        gap = df['Predicted_Gap'].to_numpy(dtype='float64')
+        # Rows with a missing Year/Orders/gap never pass the sidebar filters; a missing risk counts nowhere
+        valid = pd.notna(year) & pd.notna(orders) & ~np.isnan(gap)
+        positions = np.flatnonzero(valid)
+        year, orders, gap = year[valid], orders[valid], gap[valid]
+        codes, self.categories = level_codes(df['Risk_Level'], pd.Index([], dtype=object))
+
+        year_codes, _ = pd.factorize(year, sort=True)
+        order_bucket, n_order = _quantile_buckets(orders, BUCKETS)
+        gap_bucket, n_gap = _quantile_buckets(gap, BUCKETS)
+        cell = (year_codes.astype(np.int64) * n_order + order_bucket) * n_gap + gap_bucket
+
+        order = np.argsort(cell, kind='stable')
+        cell_sorted = cell[order]
+        starts = np.flatnonzero(np.r_[True, cell_sorted[1:] != cell_sorted[:-1]]) if len(cell) else np.array([], dtype=np.int64)
+        self.offsets = np.r_[starts, len(cell)]
+        # Rows keep their frame order within a cell, so a cell's first row of a level is its lowest position
+        self.row_pos = positions[order]
+        self.row_orders = orders[order]
+        self.row_gap = gap[order]
+        self.row_risk = codes[self.row_pos]
+
+        first = order[starts]
+        self.cell_year = year[first]
+        self.cell_count = np.diff(self.offsets)
+        if len(cell):
+            self.cell_orders_min = np.minimum.reduceat(self.row_orders, starts)
+            self.cell_orders_max = np.maximum.reduceat(self.row_orders, starts)
+            self.cell_gap_min = np.minimum.reduceat(self.row_gap, starts)
+            self.cell_gap_max = np.maximum.reduceat(self.row_gap, starts)
+        else:
+            self.cell_orders_min = self.cell_orders_max = self.cell_gap_min = self.cell_gap_max = np.array([])
+
+        n_cells = len(self.cell_count)
+        self.level_count = np.zeros((n_cells, 0), dtype=np.int64)
+        self.level_gap = np.zeros((n_cells, 0))
+        self.level_orders = np.zeros((n_cells, 0), dtype=np.int64)
+        self.level_first = np.zeros((n_cells, 0), dtype=np.int64)
+        self._lock = threading.RLock()
+        self._aggregate(np.arange(n_cells))
+
+    def _rows(self, cells):
+        # Sorted-row indices of the given cells, concatenated
+        lengths = self.cell_count[cells]
+        return np.repeat(self.offsets[cells] - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+
+    def _aggregate(self, cells):
+        n_levels = len(self.categories)
+        grow = n_levels - self.level_count.shape[1]
+        if grow:
+            def pad(values, fill):
+                return np.concatenate([values, np.full((len(values), grow), fill, dtype=values.dtype)], axis=1)
+            self.level_count, self.level_gap = pad(self.level_count, 0), pad(self.level_gap, 0)
+            self.level_orders = pad(self.level_orders, 0)
+            self.level_first = pad(self.level_first, np.iinfo(np.int64).max)
+
+        rows = self._rows(cells)
+        local = np.repeat(np.arange(len(cells)), self.cell_count[cells])
+        risk = self.row_risk[rows]
+        known = risk >= 0
+        rows, slot = rows[known], local[known] * n_levels + risk[known]
+        size = len(cells) * n_levels
+        shape = (len(cells), n_levels)
+        self.level_count[cells] = np.bincount(slot, minlength=size).reshape(shape)
+        self.level_gap[cells] = np.bincount(slot, weights=self.row_gap[rows], minlength=size).reshape(shape)
+        self.level_orders[cells] = np.bincount(slot, weights=self.row_orders[rows].astype('float64'),
+                                               minlength=size).astype(np.int64).reshape(shape)
+        first = np.full(size, np.iinfo(np.int64).max)
+        present, at = np.unique(slot, return_index=True)
+        first[present] = self.row_pos[rows[at]]
+        self.level_first[cells] = first.reshape(shape)
+
+        # Levels in first-appearance order, matching pd.factorize on the frame
+        level_first = self.level_first.min(axis=0, initial=np.iinfo(np.int64).max)
+        present = np.flatnonzero(self.level_count.sum(axis=0) > 0)
+        self.level_order = present[np.argsort(level_first[present], kind='stable')]
+        self.levels = self.categories[self.level_order].to_numpy(dtype=object)
+
+    def relabel(self, risk_level):
+        """Move rows to the levels of a reclassified ``risk_level`` column, aligned with the frame."""
+        with self._lock:
+            codes, self.categories = level_codes(risk_level, self.categories)
+            row_risk = codes[self.row_pos]
+            changed = np.flatnonzero(row_risk != self.row_risk)
+            if len(changed) or len(self.categories) > self.level_count.shape[1]:
+                self.row_risk = row_risk
+                self._aggregate(np.unique(np.searchsorted(self.offsets, changed, side='right') - 1))
+
+    def query(self, year_range, risk_levels, gap_threshold, order_range, risk_level=None):
+        with self._lock:
+            if risk_level is not None:
+                self.relabel(risk_level)
+            return self._query(year_range, risk_levels, gap_threshold, order_range)
+
+    def _query(self, year_range, risk_levels, gap_threshold, order_range):
+        order_min, order_max = order_range
+        selected = np.isin(self.categories, list(risk_levels))
+        candidate = ((self.cell_year >= year_range[0]) & (self.cell_year <= year_range[1])
+                     & (self.cell_orders_max >= order_min) & (self.cell_orders_min <= order_max)
+                     & (self.cell_gap_max >= gap_threshold))
+        full = candidate & (self.cell_orders_min >= order_min) & (self.cell_orders_max <= order_max) & (self.cell_gap_min >= gap_threshold)
+        partial = np.flatnonzero(candidate & ~full)
+        full = np.flatnonzero(full)
+
+        n_levels = len(self.categories)
+        counts = np.where(selected, self.level_count[full].sum(axis=0), 0)
+        gaps = np.where(selected, self.level_gap[full].sum(axis=0), 0.0)
+        total_orders = int(self.level_orders[full][:, selected].sum())
+        first_pos = np.where(selected, self.level_first[full].min(axis=0, initial=np.iinfo(np.int64).max),
+                             np.iinfo(np.int64).max)
+
+        if len(partial):
+            # Rescan only the rows of boundary cells
+            rows = self._rows(partial)
+            row_risk = self.row_risk[rows]
+            keep = ((self.row_orders[rows] >= order_min) & (self.row_orders[rows] <= order_max)
+                    & (self.row_gap[rows] >= gap_threshold) & np.append(selected, False)[row_risk])
+            rows, row_risk = rows[keep], row_risk[keep]
+            counts += np.bincount(row_risk, minlength=n_levels)
+            gaps += np.bincount(row_risk, weights=self.row_gap[rows], minlength=n_levels)
+            total_orders += int(self.row_orders[rows].astype(np.int64).sum())
+            np.minimum.at(first_pos, row_risk, self.row_pos[rows])
+
+        order = self.level_order
+        return level_summary(self.levels, counts[order], gaps[order], total_orders, first_pos[order])
@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from data_loader import content_hash
+from filter_engine import FilterIndex
+
+# =========================
+# CROSS-REPLICA MMAP CACHE
+# =========================
+# Prepared frames and their filter indexes are written once as uncompressed
+# Arrow IPC files. Every replica on the host memory-maps the same files, so
+# the OS page cache holds one copy and a cold replica opens them in
+# milliseconds instead of re-parsing and re-indexing.
+CACHE_DIR = Path(os.environ.get("OVERSIGHT_CACHE_DIR", Path.home() / ".cache" / "digital-oversight"))
+
+# Bump when load/enrich/index logic changes so stale files are never reused
+CACHE_VERSION = 4
+
+
+def cache_key(dataset_hash, year_range=None):
+    return content_hash(f"{CACHE_VERSION}:{dataset_hash}:{year_range}".encode())
+
+
+def _write_table(path, table):
+    import pyarrow as pa
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name per process; os.replace makes the publish atomic for racing replicas
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table.combine_chunks())
+    os.replace(tmp, path)
+
+
+def _read_table(path):
+    import pyarrow as pa
+
+    if not path.exists():
+        return None
+    return pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+
+def save_frame(key, df):
+    import pyarrow as pa
+
+    _write_table(CACHE_DIR / f"{key}.arrow", pa.Table.from_pandas(df, preserve_index=False))
+
+
+def load_frame(key):
+    table = _read_table(CACHE_DIR / f"{key}.arrow")
+    return None if table is None else table.to_pandas(split_blocks=True)
+
+
+def save_index(key, index):
+    import pyarrow as pa
+
+    arrays = index.arrays()
+    # Packed bitmaps are shorter than the sorted columns; pad them to one table length
+    length = max(len(a) for a in arrays.values())
+    columns = {}
+    for name, values in arrays.items():
+        if len(values) < length:
+            values = np.concatenate([values, np.zeros(length - len(values), dtype=values.dtype)])
+        columns[name] = pa.array(values)
+    table = pa.table(columns).replace_schema_metadata({'bitmap_bytes': str((index.n + 7) // 8)})
+    _write_table(CACHE_DIR / f"{key}.index.arrow", table)
+
+
+def load_index(key, df):
+    table = _read_table(CACHE_DIR / f"{key}.index.arrow")
+    if table is None:
+        return None
+    bitmap_bytes = int(table.schema.metadata[b'bitmap_bytes'])
+    arrays = {}
+    for name in table.column_names:
+        values = table[name].to_numpy()
+        arrays[name] = values[:bitmap_bytes] if name.startswith('risk:') else values
+    return FilterIndex.from_arrays(df, arrays)
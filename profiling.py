@@ -0,0 +1,141 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# SECTION PROFILER
+# =========================
+# Spans time named sections of a script run. With tracemalloc tracing they
+# also record net and peak allocation (numpy buffers included). Every closed
+# span goes to a rolling per-section window shared by all sessions, and, when
+# the "oversight.profile" logger is enabled, out as one JSON line.
+ROLLING_WINDOW = 500
+
+logger = logging.getLogger("oversight.profile")
+
+
+class _Frame:
+    __slots__ = ('start', 'mem_start', 'peak')
+
+
+class Profiler:
+    """Process-wide section timings with rolling p50/p95.
+
+    Spans nest per thread (each Streamlit session runs its script in its own
+    thread), so a section's time includes its children. ``begin_run`` starts
+    a new list of spans for the calling thread; ``run_spans`` returns it.
+    tracemalloc is process-wide, so allocations of sessions running at the
+    same time show up in each other's spans.
+    """
+
+    def __init__(self, window=ROLLING_WINDOW, log_path=None):
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._allocations = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        log_path = log_path or os.environ.get("OVERSIGHT_PROFILE_LOG")
+        if log_path and not any(getattr(h, 'baseFilename', None) == os.path.abspath(log_path) for h in logger.handlers):
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+
+    def begin_run(self, session=None):
+        self._local.session = session
+        self._local.run = time.time()
+        self._local.started = time.perf_counter()
+        self._local.spans = []
+        self._local.stack = []
+
+    def end_run(self):
+        """Record the whole run since ``begin_run`` as the "run" section."""
+        self._record('run', 0, (time.perf_counter() - self._local.started) * 1000, None, None)
+
+    def run_spans(self):
+        return pd.DataFrame(getattr(self._local, 'spans', []),
+                            columns=['section', 'depth', 'ms', 'alloc_bytes', 'peak_bytes'])
+
+    @contextmanager
+    def span(self, name):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            self.begin_run()
+            stack = self._local.stack
+        frame = _Frame()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # reset_peak() is process-wide, so hand the parent its peak so far first
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            frame.mem_start = frame.peak = current
+        stack.append(frame)
+        frame.start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - frame.start) * 1000
+            stack.pop()
+            alloc = peak = None
+            if tracing and tracemalloc.is_tracing():
+                current, traced_peak = tracemalloc.get_traced_memory()
+                frame.peak = max(frame.peak, traced_peak)
+                alloc, peak = current - frame.mem_start, frame.peak - frame.mem_start
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, frame.peak)
+            self._record(name, len(stack), elapsed, alloc, peak)
+
+    def profiled(self, name):
+        """Decorator form of ``span``; fragment reruns of the function are timed too."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _record(self, name, depth, ms, alloc, peak):
+        self._local.spans.append({'section': name, 'depth': depth, 'ms': ms, 'alloc_bytes': alloc, 'peak_bytes': peak})
+        with self._lock:
+            self._durations[name].append(ms)
+            if peak is not None:
+                self._allocations[name].append(peak)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'event': 'span', 'section': name, 'depth': depth, 'ms': round(ms, 3),
+                                    'alloc_bytes': alloc, 'peak_bytes': peak, 'session': self._local.session,
+                                    'run': self._local.run, 'ts': time.time()}))
+
+    def stats(self):
+        """Rolling calls/p50/p95/max per section, slowest p95 first."""
+        with self._lock:
+            durations = {name: np.array(values) for name, values in self._durations.items()}
+            allocations = {name: np.array(values) for name, values in self._allocations.items()}
+        rows = []
+        for name, ms in durations.items():
+            peak = allocations.get(name)
+            rows.append({
+                'section': name,
+                'calls': len(ms),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'max_ms': float(ms.max()),
+                'p95_peak_bytes': float(np.percentile(peak, 95)) if peak is not None and len(peak) else np.nan,
+            })
+        columns = ['section', 'calls', 'p50_ms', 'p95_ms', 'max_ms', 'p95_peak_bytes']
+        return pd.DataFrame(rows, columns=columns).sort_values('p95_ms', ascending=False, ignore_index=True)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._allocations.clear()
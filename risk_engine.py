@@ -0,0 +1,134 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import RISK_MAPPING, risk_dtype
+from filter_engine import changed_rows, patch_sorted
+
+# =========================
+# RISK CLASSIFICATION ENGINE
+# =========================
+# Rules generalize the notebook: Predicted_Gap above medium_gap / high_gap
+# gives Medium / High, and a row whose ProductionGap and Backlog_Change_Pct
+# both exceed the escalation thresholds is raised one level (capped at High).
+DEFAULT_RULES = {
+    'medium_gap': 100.0,
+    'high_gap': 300.0,
+    'escalate_production_gap': 100.0,
+    'escalate_backlog_pct': 0.1,
+}
+HIGH = len(RISK_MAPPING) - 1
+
+
+def rules_key(rules):
+    """Hashable, order-independent form of a rules dict for cache keys."""
+    return tuple(sorted(dict(DEFAULT_RULES, **rules).items()))
+
+
+def classify(gap, production_gap=None, backlog_pct=None, rules=None):
+    """Risk codes (0=Low, 1=Medium, 2=High, -1=missing gap) for whole columns at once."""
+    rules = dict(DEFAULT_RULES, **(rules or {}))
+    gap = np.asarray(gap, dtype='float64')
+    codes = _bin(gap, rules)
+    codes += _escalation(production_gap, backlog_pct, rules, len(gap))
+    np.minimum(codes, HIGH, out=codes)
+    codes[np.isnan(gap)] = -1
+    return codes
+
+
+def _bin(gap, rules):
+    # side='left' makes each threshold exclusive, as in `gap > 100`
+    edges = np.array([rules['medium_gap'], max(rules['high_gap'], rules['medium_gap'])])
+    return np.searchsorted(edges, gap, side='left').astype(np.int8)
+
+
+def _escalation(production_gap, backlog_pct, rules, n):
+    if production_gap is None or backlog_pct is None:
+        return np.zeros(n, dtype=np.int8)
+    production_gap = np.asarray(production_gap, dtype='float64')
+    backlog_pct = np.asarray(backlog_pct, dtype='float64')
+    return ((production_gap > rules['escalate_production_gap'])
+            & (backlog_pct > rules['escalate_backlog_pct'])).astype(np.int8)
+
+
+def risk_columns(codes, index=None):
+    """Risk_Level (ordered categorical) and Risk_Score series built from codes."""
+    level = pd.Series(pd.Categorical.from_codes(codes, dtype=risk_dtype()), index=index, name='Risk_Level')
+    score = pd.Series((codes + 1).astype(np.int8), index=index, name='Risk_Score')
+    return level, (score if (codes >= 0).all() else score.where(codes >= 0))
+
+
+class RiskClassifier:
+    """Reclassifies one dataset as thresholds change without rescanning it.
+
+    Predicted_Gap is sorted once; moving a gap threshold only re-bins the rows
+    whose gap lies between its old and new value. The escalation mask is
+    recomputed only when its own thresholds change. Passing an updated frame
+    to ``classify`` re-bins just the rows whose inputs changed.
+    """
+
+    def __init__(self, df, rules=None):
+        self._load(df, dict(DEFAULT_RULES, **(rules or {})))
+        self._lock = threading.Lock()
+
+    def _load(self, df, rules):
+        gap = df['Predicted_Gap'].to_numpy(dtype='float64', copy=True)
+        self.gap = gap
+        self.order = np.argsort(gap, kind='stable')
+        self.gap_sorted = gap[self.order]
+        self.production_gap = df['ProductionGap'].to_numpy(dtype='float64', copy=True) if 'ProductionGap' in df else None
+        self.backlog_pct = df['Backlog_Change_Pct'].to_numpy(dtype='float64', copy=True) if 'Backlog_Change_Pct' in df else None
+        self.missing = np.isnan(gap)
+        self.rules = rules
+        self.base = _bin(gap, rules)
+        self.escalate = _escalation(self.production_gap, self.backlog_pct, rules, len(gap))
+
+    def _sync(self, df):
+        if len(df) != len(self.gap):
+            self._load(df, self.rules)
+            return
+        gap = df['Predicted_Gap'].to_numpy(dtype='float64')
+        rows = changed_rows(self.gap, gap)
+        if len(rows):
+            self.gap[rows] = gap[rows]
+            self.missing[rows] = np.isnan(gap[rows])
+            self.order, self.gap_sorted = patch_sorted(self.gap, self.order, self.gap_sorted, rows)
+            self.base[rows] = _bin(self.gap[rows], self.rules)
+        if self.production_gap is not None and self.backlog_pct is not None:
+            production_gap = df['ProductionGap'].to_numpy(dtype='float64')
+            backlog_pct = df['Backlog_Change_Pct'].to_numpy(dtype='float64')
+            rows = np.union1d(changed_rows(self.production_gap, production_gap), changed_rows(self.backlog_pct, backlog_pct))
+            if len(rows):
+                self.production_gap[rows] = production_gap[rows]
+                self.backlog_pct[rows] = backlog_pct[rows]
+                self.escalate[rows] = _escalation(production_gap[rows], backlog_pct[rows], self.rules, len(rows))
+
+    def _rebin(self, old, new):
+        # Rows with old < gap <= new (or new < gap <= old) are the only ones that move
+        low, high = min(old, new), max(old, new)
+        lo = np.searchsorted(self.gap_sorted, low, side='right')
+        hi = np.searchsorted(self.gap_sorted, high, side='right')
+        if hi > lo:
+            rows = self.order[lo:hi]
+            self.base[rows] = _bin(self.gap[rows], self.rules)
+
+    def classify(self, rules=None, df=None):
+        rules = dict(DEFAULT_RULES, **(rules or {}))
+        with self._lock:
+            if df is not None:
+                self._sync(df)
+            old = self.rules
+            self.rules = rules
+            old_edges = (old['medium_gap'], max(old['high_gap'], old['medium_gap']))
+            new_edges = (rules['medium_gap'], max(rules['high_gap'], rules['medium_gap']))
+            for before, after in zip(old_edges, new_edges):
+                if before != after:
+                    self._rebin(before, after)
+            if (old['escalate_production_gap'], old['escalate_backlog_pct']) != \
+                    (rules['escalate_production_gap'], rules['escalate_backlog_pct']):
+                self.escalate = _escalation(self.production_gap, self.backlog_pct, rules, len(self.gap))
+            codes = self.base + self.escalate
+            codes[self.missing] = -1
+        np.minimum(codes, HIGH, out=codes)
+        return codes
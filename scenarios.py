@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from forecast import observed_mask, solve
+
+# =========================
+# MONTE CARLO SCENARIOS
+# =========================
+# Forward production gap per future year is simulated as the fitted trend plus
+#   - an output-shortfall random walk with the trend residuals' volatility,
+#     so uncertainty widens with the horizon, and
+#   - an order-intake shock: lognormal orders around the historical mean,
+#     passed through the historical gap-per-order sensitivity.
+# Draws are batched (scenarios x years) arrays; batches are independent
+# SeedSequence children, so results depend only on the seed and count.
+BATCH_SIZE = 250_000
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+FUTURE_YEARS = 3
+
+
+def scenario_inputs(df, target='ProductionGap'):
+    """Per-year history and the model parameters the simulation needs."""
+    observed = observed_mask(df, target)
+    year = df['Year'].to_numpy(dtype='float64')
+    hist_years, inverse = np.unique(year[observed], return_inverse=True)
+    count = np.bincount(inverse, minlength=len(hist_years))
+    gap = np.bincount(inverse, weights=df[target].to_numpy(dtype='float64')[observed], minlength=len(hist_years)) / count
+    orders = np.bincount(inverse, weights=df['Orders'].to_numpy(dtype='float64')[observed], minlength=len(hist_years)) / count
+
+    future = np.setdiff1d(np.unique(year[~np.isnan(year)]), hist_years)
+    if not len(future) and len(hist_years):
+        future = hist_years[-1] + np.arange(1, FUTURE_YEARS + 1)
+    origin = hist_years.mean() if len(hist_years) else 0.0
+    x = hist_years - origin
+    sums = np.array([[len(x)], [x.sum()], [gap.sum()], [(x * x).sum()], [(x * gap).sum()]], dtype='float64')
+    slope, intercept, _ = solve(sums)
+    slope = float(slope[0])
+    intercept = float(intercept[0]) if len(x) else 0.0
+    resid = gap - (intercept + slope * x)
+    order_mean = float(orders.mean()) if len(orders) else 0.0
+    order_var = float(orders.var()) if len(orders) else 0.0
+    return {
+        'years': future,
+        'trend': intercept + slope * (future - origin),
+        'sigma': float(resid.std(ddof=2)) if len(x) > 2 else 0.0,
+        'order_mean': order_mean,
+        'order_cv': float(np.sqrt(order_var) / order_mean) if order_mean > 0 else 0.0,
+        'order_beta': float(np.cov(orders, gap, ddof=0)[0, 1] / order_var) if order_var > 0 else 0.0,
+    }
+
+
+def _simulate_batch(args):
+    params, n, seed = args
+    rng = np.random.default_rng(seed)
+    years = len(params['trend'])
+    shortfall = np.cumsum(rng.standard_normal((n, years), dtype=np.float32), axis=1) * np.float32(params['sigma'])
+    cv = params['order_cv']
+    # Lognormal with the historical mean and coefficient of variation
+    s = np.sqrt(np.log1p(cv * cv))
+    orders = params['order_mean'] * np.exp(s * rng.standard_normal((n, years), dtype=np.float32) - s * s / 2)
+    gap = params['trend'].astype(np.float32) + shortfall + np.float32(params['order_beta']) * (orders - params['order_mean'])
+    return gap.astype(np.float32)
+
+
+def simulate(params, n_scenarios=1_000_000, seed=0, workers=None):
+    """Simulated gaps, shape (n_scenarios, n_future_years), reproducible for a given seed."""
+    sizes = [BATCH_SIZE] * (n_scenarios // BATCH_SIZE)
+    if n_scenarios % BATCH_SIZE:
+        sizes.append(n_scenarios % BATCH_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    batches = [(params, size, child) for size, child in zip(sizes, seeds)]
+    workers = min(workers or os.cpu_count() or 1, len(batches))
+    if workers <= 1:
+        return np.concatenate([_simulate_batch(b) for b in batches])
+    # Forking the threaded Streamlit server can copy held locks into the workers and hang them
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        return np.concatenate(list(pool.map(_simulate_batch, batches)))
+
+
+def summarize(gaps, high_gap):
+    """Quantile bands and P(gap > high_gap) per simulated year."""
+    return {
+        'quantiles': np.quantile(gaps, QUANTILES, axis=0),
+        'p_high': (gaps > high_gap).mean(axis=0),
+    }
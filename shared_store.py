@@ -0,0 +1,91 @@
+import io
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# =========================
+# PROCESS-WIDE DATASET STORE
+# =========================
+DEFAULT_MAX_BYTES = int(os.environ.get("OVERSIGHT_STORE_MB", 2048)) * 2**20
+
+
+class DatasetStore:
+    """Prepared datasets shared read-only by every session in the process.
+
+    Entries are evicted least-recently-used beyond ``max_entries`` or once
+    together they exceed ``max_bytes`` (the newest entry is always kept), and
+    after ``ttl`` seconds. Concurrent first requests for the same key load it once.
+    Callers must treat returned frames as read-only; pandas copy-on-write
+    keeps any derived frame from writing back into the shared one.
+    """
+
+    def __init__(self, max_entries=8, ttl=3600, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, load):
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry['df']
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._lookup(key)
+            if entry is None:
+                df = load()
+                entry = {'df': df, 'loaded_at': time.time(), 'bytes': int(df.memory_usage(deep=True).sum())}
+                with self._lock:
+                    self._entries[key] = entry
+                    self._evict()
+        return entry['df']
+
+    def _evict(self):
+        now = time.time()
+        for key in [key for key, entry in self._entries.items() if now - entry['loaded_at'] > self.ttl]:
+            del self._entries[key]
+            self._key_locks.pop(key, None)
+        total = sum(entry['bytes'] for entry in self._entries.values())
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            evicted, entry = self._entries.popitem(last=False)
+            self._key_locks.pop(evicted, None)
+            total -= entry['bytes']
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['loaded_at'] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def report(self):
+        with self._lock:
+            now = time.time()
+            return [{'key': key, 'rows': len(entry['df']), 'bytes': entry['bytes'], 'age_s': now - entry['loaded_at']}
+                    for key, entry in self._entries.items()]
+
+
+def session_footprint(state):
+    """Approximate bytes held by one session's state (widget values, upload buffers)."""
+    total = 0
+    for value in state.values():
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            usage = value.memory_usage(deep=True)
+            total += int(usage.sum() if isinstance(usage, pd.Series) else usage)
+        elif isinstance(value, io.BytesIO):
+            with value.getbuffer() as buffer:
+                total += buffer.nbytes
+        else:
+            total += sys.getsizeof(value)
+    return total
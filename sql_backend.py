@@ -0,0 +1,155 @@
+import importlib.util
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from metrics_cube import level_codes, level_summary
+
+# =========================
+# EMBEDDED SQL BACKEND
+# =========================
+# Same filter/aggregate contract as FilterIndex + MetricsCube, pushed down to an
+# embedded database file. DuckDB is used when installed; sqlite3 otherwise.
+TABLE = 'oversight'
+INSERT_CHUNK = 100_000
+
+
+def available_engine():
+    return 'duckdb' if importlib.util.find_spec('duckdb') is not None else 'sqlite'
+
+
+def _where(year_range, risk_levels, gap_threshold, order_range):
+    levels = list(risk_levels)
+    clause = ("Year BETWEEN ? AND ? AND Orders BETWEEN ? AND ? AND Predicted_Gap >= ? "
+              f"AND Risk_Level IN ({', '.join('?' * len(levels))})")
+    params = [int(year_range[0]), int(year_range[1]), int(order_range[0]), int(order_range[1]),
+              float(gap_threshold), *levels]
+    return clause, params
+
+
+class SQLBackend:
+    """A prepared frame loaded into an embedded database and queried with SQL.
+
+    ``row_pos`` keeps each row's position in the source frame, so results map
+    back onto it with ``iloc``. Connections are shared across sessions and
+    serialized with a lock. Queries may pass a reclassified ``risk_level``
+    column; only the rows whose level differs from the table are updated.
+    """
+
+    def __init__(self, df, path=None, engine=None):
+        self.engine = engine or available_engine()
+        self.n = len(df)
+        self._lock = threading.RLock()
+        if path is not None and os.path.exists(path):
+            self.conn = self._connect(path)
+            # A cached file may still hold another session's labels
+            stored = pd.Series([level for level, in self._fetch(f"SELECT Risk_Level FROM {TABLE} ORDER BY row_pos")])
+            self.codes, self.categories = level_codes(stored, pd.Index([], dtype=object))
+            self._relabel(df['Risk_Level'])
+        else:
+            self.conn = self._build(df, path)
+            self.codes, self.categories = level_codes(df['Risk_Level'], pd.Index([], dtype=object))
+        self._levels()
+
+    def _connect(self, path):
+        if self.engine == 'duckdb':
+            import duckdb
+            return duckdb.connect(str(path) if path else ':memory:')
+        return sqlite3.connect(str(path) if path else ':memory:', check_same_thread=False)
+
+    def _build(self, df, path):
+        # Build under a temporary name and publish atomically, like the mmap cache
+        tmp = f"{path}.{os.getpid()}.tmp" if path else None
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        conn = self._connect(tmp)
+        frame = df.assign(row_pos=np.arange(len(df), dtype=np.int64))
+        frame['Risk_Level'] = frame['Risk_Level'].astype(object)
+        if self.engine == 'duckdb':
+            conn.register('frame', frame)
+            conn.execute(f"CREATE TABLE {TABLE} AS SELECT * FROM frame")
+            conn.unregister('frame')
+        else:
+            frame.to_sql(TABLE, conn, index=False, chunksize=INSERT_CHUNK)
+            conn.execute(f"CREATE INDEX {TABLE}_year ON {TABLE} (Year, Risk_Level)")
+            conn.execute(f"CREATE INDEX {TABLE}_gap ON {TABLE} (Predicted_Gap)")
+            conn.commit()
+        if tmp:
+            conn.close()
+            os.replace(tmp, path)
+            conn = self._connect(path)
+        return conn
+
+    def _fetch(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _levels(self):
+        # Levels in first-appearance order, matching pd.factorize in MetricsCube
+        known = np.flatnonzero(self.codes >= 0)
+        present, first = np.unique(self.codes[known], return_index=True)
+        self.levels = self.categories[present[np.argsort(first, kind='stable')]].to_numpy(dtype=object)
+
+    def _relabel(self, risk_level):
+        codes, self.categories = level_codes(risk_level, self.categories)
+        changed = np.flatnonzero(codes != self.codes)
+        if not len(changed):
+            return
+        labels = np.append(self.categories.to_numpy(dtype=object), None)[codes[changed]]
+        changes = pd.DataFrame({'row_pos': changed.astype(np.int64), 'level': labels})
+        update = (f"UPDATE {TABLE} SET Risk_Level = changes.level FROM changes "
+                  f"WHERE {TABLE}.row_pos = changes.row_pos")
+        with self._lock:
+            if self.engine == 'duckdb':
+                self.conn.register('changes', changes)
+                self.conn.execute(update)
+                self.conn.unregister('changes')
+            else:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_pos ON {TABLE} (row_pos)")
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS changes (row_pos INTEGER PRIMARY KEY, level TEXT)")
+                self.conn.execute("DELETE FROM changes")
+                self.conn.executemany("INSERT INTO changes VALUES (?, ?)",
+                                      zip(changes['row_pos'].tolist(), changes['level'].tolist()))
+                self.conn.execute(update)
+                self.conn.commit()
+            self.codes = codes
+            self._levels()
+
+    def query(self, year_range, risk_levels, gap_threshold, order_range, risk_level=None):
+        """Aggregates for the sidebar filters, in the same shape as MetricsCube.query."""
+        with self._lock:
+            if risk_level is not None:
+                self._relabel(risk_level)
+            return self._query(year_range, risk_levels, gap_threshold, order_range)
+
+    def _query(self, year_range, risk_levels, gap_threshold, order_range):
+        n_levels = len(self.levels)
+        counts = np.zeros(n_levels, dtype=np.int64)
+        gaps = np.zeros(n_levels)
+        orders = np.zeros(n_levels, dtype=np.int64)
+        first_pos = np.full(n_levels, np.iinfo(np.int64).max)
+        if risk_levels:
+            where, params = _where(year_range, risk_levels, gap_threshold, order_range)
+            rows = self._fetch(f"SELECT Risk_Level, COUNT(*), SUM(Predicted_Gap), SUM(Orders), MIN(row_pos) "
+                               f"FROM {TABLE} WHERE {where} GROUP BY Risk_Level", params)
+            slot = {level: i for i, level in enumerate(self.levels)}
+            for level, count, gap, order_sum, first in rows:
+                i = slot[level]
+                counts[i], gaps[i], orders[i], first_pos[i] = count, gap, order_sum, first
+
+        return level_summary(self.levels, counts, gaps, int(orders.sum()), first_pos)
+
+    def positions(self, year_range, risk_levels, gap_threshold, order_range, risk_level=None):
+        """Sorted row positions matching the sidebar filters, or None for all rows."""
+        if not risk_levels:
+            return np.array([], dtype=np.int64)
+        where, params = _where(year_range, risk_levels, gap_threshold, order_range)
+        with self._lock:
+            if risk_level is not None:
+                self._relabel(risk_level)
+            rows = self._fetch(f"SELECT row_pos FROM {TABLE} WHERE {where} ORDER BY row_pos", params)
+        positions = np.fromiter((pos for pos, in rows), dtype=np.int64, count=len(rows))
+        return None if len(positions) == self.n else positions
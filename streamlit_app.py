@@ -1,8 +1,32 @@
+import functools
+import os
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+from data_loader import (DTYPES, RISK_MAPPING, SERIES_COLUMNS, enrich, file_fingerprint, ingest_csv, memory_report,
+                         parquet_year_bounds, persist_upload, read_dataset, source_format, spill_path, stream_hash)
+from density import binned_density, correlation_matrix
+from downsample import lttb, minmax
+from figure_cache import FigureCache
+from alerts import AlertEngine
+from backtest import summarize as backtest_summary, walk_forward
+from forecast import IncrementalForecast
+from filter_engine import FilterIndex
+from metrics_cube import MetricsCube
+from profiling import Profiler
+from mmap_cache import CACHE_DIR, cache_key, load_frame, load_index, save_frame, save_index
+from risk_engine import DEFAULT_RULES, RiskClassifier, risk_columns, rules_key
+from scenarios import scenario_inputs, simulate, summarize
+from shared_store import DatasetStore, session_footprint
+from sql_backend import SQLBackend, available_engine
+from table_view import GradientPalette, sort_order
+from telemetry import LiveView, TelemetryFeed
 
 # =========================
 # PAGE CONFIG
@@ -14,416 +38,251 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# =========================
+# PROFILING
+# =========================
+# Shared by every session so the diagnostics panel shows rolling p50/p95 per section
+@st.cache_resource
+def get_profiler():
+    return Profiler()
+
+profiler = get_profiler()
+profiler.begin_run(st.session_state.setdefault("profile_session", uuid.uuid4().hex[:8]))
+
 # =========================
 # PROFESSIONAL BOEING ENTERPRISE THEME
 # =========================
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
-
-/* Global Styles */
-.stApp { 
-    background: #F8F9FA; 
-    font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-}
-.block-container { 
-    padding-top: 1rem; 
-    padding-bottom: 2rem; 
-    max-width: 1600px;
-}
-
-/* Professional Header */
-.dashboard-header { 
-    background: linear-gradient(180deg, #001D3D 0%, #003566 100%);
-    padding: 0;
-    margin: -1rem -3rem 2rem -3rem;
-    border-bottom: 4px solid #0047AB;
-    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-}
-
-.header-top-bar {
-    background: #000B1D;
-    padding: 0.5rem 3rem;
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    font-size: 0.75rem;
-    color: #A0AEC0;
-}
-
-.header-main {
-    padding: 1.75rem 3rem;
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-}
-
-.header-left {
-    display: flex;
-    align-items: center;
-    gap: 2rem;
-}
-
-.boeing-logo-container {
-    display: flex;
-    align-items: center;
-    gap: 1rem;
-    padding-right: 2rem;
-    border-right: 1px solid rgba(255,255,255,0.2);
-}
-
-.boeing-logo {
-    font-family: 'Inter', sans-serif;
-    font-size: 2rem;
-    font-weight: 800;
-    color: white;
-    letter-spacing: 8px;
-    line-height: 1;
-}
-
-.boeing-symbol {
-    width: 45px;
-    height: 45px;
-    background: white;
-    border-radius: 50%;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-weight: 800;
-    color: #001D3D;
-    font-size: 1.5rem;
-}
-
-.header-title-section h1 { 
-    color: white; 
-    font-size: 1.75rem; 
-    font-weight: 700; 
-    margin: 0; 
-    letter-spacing: -0.5px;
-}
-
-.header-title-section p { 
-    color: #94A3B8; 
-    font-size: 0.875rem; 
-    margin: 0.25rem 0 0 0; 
-    font-weight: 400;
-}
-
-.header-right {
-    display: flex;
-    gap: 1.5rem;
-    align-items: center;
-}
-
-.header-stat {
-    text-align: right;
-}
-
-.header-stat-label {
-    font-size: 0.75rem;
-    color: #94A3B8;
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-    margin-bottom: 0.25rem;
-}
-
-.header-stat-value {
-    font-size: 1.5rem;
-    color: white;
-    font-weight: 700;
-}
-
-/* Section Headers */
-.section-header { 
-    color: #1E293B; 
-    font-size: 1.25rem; 
-    font-weight: 700; 
-    margin: 2.5rem 0 1.5rem 0; 
-    padding-bottom: 0.75rem; 
-    border-bottom: 2px solid #E2E8F0;
-    display: flex;
-    align-items: center;
-    gap: 0.75rem;
-}
-
-.section-header::before {
-    content: '';
-    width: 4px;
-    height: 24px;
-    background: #0047AB;
-    border-radius: 2px;
-}
-
-/* Metric Cards - Clean & Professional */
-.metric-card { 
-    background: white; 
-    padding: 1.5rem; 
-    border-radius: 12px; 
-    border: 1px solid #E2E8F0;
-    box-shadow: 0 1px 3px rgba(0, 0, 0, 0.05);
-    margin-bottom: 1rem; 
-    transition: all 0.2s ease;
-}
-
-.metric-card:hover { 
-    box-shadow: 0 4px 12px rgba(0, 71, 171, 0.1);
-    border-color: #0047AB;
-    transform: translateY(-2px);
-}
-
-.metric-label { 
-    font-size: 0.75rem; 
-    color: #64748B; 
-    font-weight: 600; 
-    text-transform: uppercase; 
-    letter-spacing: 0.5px; 
-    margin-bottom: 0.5rem;
-}
-
-.metric-value { 
-    font-size: 2rem; 
-    color: #0F172A; 
-    font-weight: 700; 
-    line-height: 1; 
-    margin-bottom: 0.5rem;
-}
-
-.metric-delta { 
-    font-size: 0.875rem; 
-    color: #64748B; 
-    font-weight: 500;
-}
-
-/* Alert Boxes - Professional Style */
-.alert-box { 
-    padding: 1.25rem 1.5rem; 
-    border-radius: 12px; 
-    margin: 1.5rem 0; 
-    border: 1px solid;
-    box-shadow: 0 1px 3px rgba(0, 0, 0, 0.05);
-}
-
-.alert-box.critical { 
-    background: #FEF2F2; 
-    border-color: #FCA5A5;
-}
-
-.alert-box.success { 
-    background: #F0FDF4; 
-    border-color: #86EFAC;
-}
-
-.alert-box.info { 
-    background: #EFF6FF; 
-    border-color: #93C5FD;
-}
-
-.alert-box h4 { 
-    font-size: 0.95rem; 
-    font-weight: 700; 
-    margin-top: 0; 
-    margin-bottom: 0.75rem; 
-    color: #0F172A;
-    display: flex;
-    align-items: center;
-    gap: 0.5rem;
-}
-
-.alert-box ul { 
-    margin: 0; 
-    padding-left: 1.5rem;
-}
-
-.alert-box li { 
-    margin-bottom: 0.5rem; 
-    line-height: 1.6; 
-    font-size: 0.875rem; 
-    color: #334155;
-}
-
-/* Risk Items */
-.risk-item { 
-    margin-bottom: 1rem; 
-    padding: 1rem 1.25rem; 
-    background: white; 
-    border-radius: 10px; 
-    border: 1px solid #E2E8F0;
-    box-shadow: 0 1px 2px rgba(0, 0, 0, 0.05);
-}
-
-.risk-header { 
-    display: flex; 
-    justify-content: space-between; 
-    align-items: center; 
-    margin-bottom: 0.75rem;
-}
-
-.risk-label { 
-    font-weight: 600; 
-    font-size: 0.875rem; 
-    color: #1E293B;
-}
-
-.risk-count { 
-    font-weight: 700; 
-    font-size: 1rem;
-}
-
-.risk-bar-bg { 
-    background: #F1F5F9; 
-    border-radius: 10px; 
-    height: 10px; 
-    overflow: hidden;
-}
-
-.risk-bar-fill { 
-    height: 100%; 
-    border-radius: 10px; 
-    transition: width 0.3s ease;
-}
-
-/* Phase Cards */
-.phase-card { 
-    text-align: center; 
-    padding: 1.5rem 1rem; 
-    background: white; 
-    border-radius: 12px;
-    border: 1px solid #E2E8F0;
-    box-shadow: 0 1px 3px rgba(0, 0, 0, 0.05);
-    transition: all 0.2s ease;
-}
-
-.phase-card:hover { 
-    transform: translateY(-3px); 
-    box-shadow: 0 4px 12px rgba(0, 71, 171, 0.15);
-    border-color: #0047AB;
-}
-
-.phase-progress { 
-    font-size: 2rem; 
-    font-weight: 800; 
-    color: #0047AB; 
-    line-height: 1;
-}
-
-.phase-label { 
-    font-size: 0.75rem; 
-    color: #64748B; 
-    margin-top: 0.5rem; 
-    font-weight: 600; 
-    text-transform: uppercase; 
-    letter-spacing: 0.5px;
-}
-
-/* Chart Container */
-.chart-container { 
-    background: white; 
-    padding: 1.5rem; 
-    border-radius: 12px; 
-    border: 1px solid #E2E8F0;
-    box-shadow: 0 1px 3px rgba(0, 0, 0, 0.05);
-    margin-bottom: 1.5rem;
-}
-
-/* Footer */
-.dashboard-footer { 
-    text-align: center; 
-    padding: 2rem 0 1rem 0; 
-    border-top: 1px solid #E2E8F0; 
-    margin-top: 3rem;
-}
-
-.footer-title { 
-    color: #475569; 
-    font-size: 0.875rem; 
-    font-weight: 600; 
-    margin: 0;
-}
-
-.footer-meta { 
-    color: #94A3B8; 
-    font-size: 0.75rem; 
-    margin-top: 0.5rem;
-}
-
-/* Streamlit Component Overrides */
-.stButton>button { 
-    background: linear-gradient(135deg, #001D3D 0%, #0047AB 100%);
-    color: white; 
-    border: none; 
-    border-radius: 8px; 
-    padding: 0.625rem 1.5rem; 
-    font-weight: 600; 
-    font-size: 0.875rem;
-    transition: all 0.2s ease;
-    box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-}
-
-.stButton>button:hover { 
-    background: linear-gradient(135deg, #0047AB 0%, #0066CC 100%);
-    box-shadow: 0 4px 12px rgba(0, 71, 171, 0.3);
-    transform: translateY(-1px);
-}
-
-/* Tabs */
-.stTabs [data-baseweb="tab-list"] { 
-    gap: 0.5rem; 
-    background-color: transparent;
-    border-bottom: 2px solid #E2E8F0;
-}
-
-.stTabs [data-baseweb="tab"] { 
-    background-color: transparent;
-    border-radius: 0;
-    padding: 0.875rem 1.5rem; 
-    font-weight: 600;
-    font-size: 0.875rem;
-    color: #64748B;
-    border-bottom: 3px solid transparent;
-}
-
-.stTabs [aria-selected="true"] { 
-    background: transparent;
-    color: #0047AB;
-    border-bottom-color: #0047AB;
-}
-
-/* Sidebar Styling */
-[data-testid="stSidebar"] {
-    background: white;
-    border-right: 1px solid #E2E8F0;
-}
-
-[data-testid="stSidebar"] .stMarkdown {
-    font-size: 0.875rem;
-}
-
-/* Remove default Streamlit padding */
-.css-1d391kg, .css-12oz5g7 {
-    padding-top: 1rem;
-}
-</style>
-""", unsafe_allow_html=True)
+# Served from ./static (see .streamlit/config.toml) and cached by the browser, so a
+# rerun sends a one-line @import instead of the whole stylesheet
+THEME_CSS = Path(__file__).with_name("static") / "theme.css"
+if st.get_option("server.enableStaticServing"):
+    st.html("<style>@import url('app/static/theme.css');</style>")
+else:
+    st.html(THEME_CSS)
 
 # =========================
 # EMBEDDED DATASET
 # =========================
-data = {
-    'Year': [2021, 2022, 2023, 2024, 2025, 2026, 2027, 2028],
-    'PlannedOutput': [264, 372, 456, 456, 456, 0, 0, 0],
-    'ActualOutput': [263, 387, 396, 265, 455, 0, 0, 0],
-    'Orders': [395, 626, 1075, 236, 488, 0, 0, 0],
-    'Backlog': [341, 365, 433, 430, 164, 0, 0, 0],
-    'ProductionGap': [41, 3, 32, 319, 411, 0, 0, 0],
-    'Backlog_Change_Pct': [0, -1, 6, -0.007, 0.119, 0, 0, 0],
-    'NetLoss': [-45, -150.07, 600.186, -476.9, -724.3, 0, 0, 0],
-    'ForwardLosses': [9.2, -54, -63, -217, -585, 0, 0, 0],
-    'ExcessCapacityCost': [-227.3, 600, 300, -70, -55, 0, 0, 0],
-    'Risk_Level': ['Low', 'Low', 'Medium', 'Medium', 'High', 'High', 'High', 'High'],
-    'Predicted_Gap': [-75.6, 27, 129.6, 232.2, 334.8, 437.4, 540, 642.6]
-}
+# Built once per process; callers copy before enriching
+@st.cache_resource
+def embedded_dataset():
+    data = {
+        'Year': [2021, 2022, 2023, 2024, 2025, 2026, 2027, 2028],
+        'PlannedOutput': [264, 372, 456, 456, 456, 0, 0, 0],
+        'ActualOutput': [263, 387, 396, 265, 455, 0, 0, 0],
+        'Orders': [395, 626, 1075, 236, 488, 0, 0, 0],
+        'Backlog': [341, 365, 433, 430, 164, 0, 0, 0],
+        'ProductionGap': [41, 3, 32, 319, 411, 0, 0, 0],
+        'Backlog_Change_Pct': [0, -1, 6, -0.007, 0.119, 0, 0, 0],
+        'NetLoss': [-45, -150.07, 600.186, -476.9, -724.3, 0, 0, 0],
+        'ForwardLosses': [9.2, -54, -63, -217, -585, 0, 0, 0],
+        'ExcessCapacityCost': [-227.3, 600, 300, -70, -55, 0, 0, 0],
+        'Risk_Level': ['Low', 'Low', 'Medium', 'Medium', 'High', 'High', 'High', 'High'],
+        'Predicted_Gap': [-75.6, 27, 129.6, 232.2, 334.8, 437.4, 540, 642.6]
+    }
+    return pd.DataFrame(data).astype(DTYPES)
 
-df_embedded = pd.DataFrame(data)
+# =========================
+# CACHED LOAD & ENRICH
+# =========================
+# Keyed by content hash so reruns, re-uploads of the same file and every other
+# session in this process reuse one read-only prepared frame instead of a copy each.
+@st.cache_resource
+def get_dataset_store():
+    return DatasetStore(max_entries=8, ttl=3600)
+
+def is_embedded(dataset_hash):
+    # Derived keys carry ":suffix" tags; the embedded frame is never persisted to disk
+    return dataset_hash.split(":", 1)[0] == "embedded"
+
+def load_dataset(dataset_hash, source=None, year_range=None):
+    def load():
+        if source is None:
+            with profiler.span("enrich"):
+                return enrich(embedded_dataset().copy())
+        # Another replica on this host may already have prepared it
+        key = cache_key(dataset_hash, year_range)
+        df = load_frame(key)
+        if df is None:
+            with st.spinner("Preparing dataset..."):
+                if hasattr(source, "seek"):
+                    source.seek(0)
+                with profiler.span("read"):
+                    raw = read_dataset(source, year_range=year_range)
+                with profiler.span("enrich"):
+                    df = enrich(raw)
+            try:
+                save_frame(key, df)
+            except OSError:
+                pass
+        return df
+    return get_dataset_store().get((dataset_hash, year_range), load)
+
+# Indexes and aggregates are read-only and large, so they are shared rather than copied per rerun
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner="Indexing dataset...")
+def build_filter_index(dataset_hash, year_range, _df):
+    if is_embedded(dataset_hash):
+        return FilterIndex(_df)
+    key = cache_key(dataset_hash, year_range)
+    index = load_index(key, _df)
+    if index is None:
+        index = FilterIndex(_df)
+        try:
+            save_index(key, index)
+        except OSError:
+            pass
+    return index
+
+# Keyed without the risk rules: a reclassified Risk_Level re-aggregates only the cells whose rows moved level
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner="Aggregating dataset...")
+def build_metrics_cube(dataset_hash, year_range, _df):
+    return MetricsCube(_df)
+
+# One table per dataset; rule changes are pushed to it as updates of the rows whose level moved
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner="Loading dataset into SQL engine...")
+def build_sql_backend(dataset_hash, year_range, _df):
+    # Forecast revisions change often, so they are not persisted
+    if is_embedded(dataset_hash) or dataset_hash != stable_key(dataset_hash):
+        return SQLBackend(_df)
+    engine = available_engine()
+    path = CACHE_DIR / f"{cache_key(dataset_hash, year_range)}.{engine}"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return SQLBackend(_df, path, engine)
+    except OSError:
+        return SQLBackend(_df, engine=engine)
+
+# Uploaded actuals outlive the forecaster below, which replays them when rebuilt
+@st.cache_resource
+def forecast_actuals(dataset_hash, year_range, series):
+    return []
+
+# Shared and updated in place as actuals arrive; each batch bumps its revision
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner="Fitting forecasts...")
+def get_forecaster(dataset_hash, year_range, series, _df):
+    forecaster = IncrementalForecast(_df, series)
+    for token, batch in list(forecast_actuals(dataset_hash, year_range, series)):
+        forecaster.append(batch, token=token)
+    return forecaster
+
+def revision_key(key, revision):
+    return f"{key}@{revision}" if revision else key
+
+def stable_key(key):
+    return key.split("@", 1)[0]
+
+def frame_base(frame_key):
+    return frame_key[0] if isinstance(frame_key, tuple) else frame_key
+
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner="Classifying risk...")
+def get_risk_classifier(dataset_hash, year_range, _df):
+    return RiskClassifier(_df)
+
+# Only the thresholds change between calls; the classifier re-bins the rows they moved across
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner=False)
+def classified_frame(dataset_hash, year_range, risk_rules, _df):
+    # One classifier per forecast lineage; later revisions re-bin only the rows that changed
+    classifier = get_risk_classifier(stable_key(dataset_hash), year_range, _df)
+    codes = classifier.classify(dict(risk_rules), _df)
+    risk_level, risk_score = risk_columns(codes, _df.index)
+    return _df.assign(Risk_Level=risk_level, Risk_Score=risk_score)
+
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner=False)
+def refreshed_filter_index(dataset_hash, year_range, _df, _index):
+    return _index.refreshed(_df)
+
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner=False)
+def relabeled_filter_index(dataset_hash, year_range, risk_rules, _df, _index):
+    return _index.with_risk_levels(_df['Risk_Level'])
+
+# One materialized view per filter state and engine, shared by every section and session
+@st.cache_resource(max_entries=32, ttl=3600, show_spinner=False)
+def filtered_view(dataset_hash, year_range, filters, engine, _df, _positions):
+    positions = _positions(*filters)
+    return _df if positions is None else _df.iloc[positions]
+
+# One alert state per lineage; a new rule set or revision folds in only the rows whose flags or risk changed
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner=False)
+def get_alert_engine(lineage_key, year_range, series):
+    return AlertEngine(series=series)
+
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner=False)
+def risk_palette(dataset_hash, year_range, _df):
+    return GradientPalette(_df['Risk_Score'])
+
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner=False)
+def column_memory_report(dataset_hash, year_range, _df):
+    return memory_report(_df)
+
+@st.cache_resource(max_entries=32, ttl=3600, show_spinner=False)
+def table_sort_order(view_key, column, ascending, _df_filtered):
+    return sort_order(_df_filtered[column], ascending)
+
+# =========================
+# FIGURE CACHE
+# =========================
+# Built figures are shared across sessions; toggling chart options or tabs
+# back to an earlier state is served without rebuilding or revalidating traces.
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+
+def show_chart(key, build):
+    st.plotly_chart(get_figure_cache().get_or_build(key, build), use_container_width=True)
+
+TREND_POINT_BUDGET = 4000
+SCATTER_POINT_BUDGET = 50_000
+DENSITY_BINS = 60
+SCENARIO_COUNTS = [10_000, 100_000, 1_000_000, 5_000_000]
+
+# Summaries only (a few arrays), cached per view and parameter set; the raw draws are dropped
+@st.cache_resource(max_entries=32, ttl=3600, show_spinner="Simulating scenarios...")
+def scenario_bands(view_key, n_scenarios, seed, high_gap, _df):
+    params = scenario_inputs(_df)
+    if not len(params['years']):
+        return None
+    # The pool only pays for itself above a few million draws
+    gaps = simulate(params, n_scenarios, seed, workers=None if n_scenarios > 2_000_000 else 1)
+    return {'years': params['years'], **summarize(gaps, high_gap)}
+
+# Scored on the unfiltered history: the year filter would otherwise truncate the expanding window
+@st.cache_resource(max_entries=16, ttl=3600, show_spinner="Backtesting forecasts...")
+def backtest_scores(dataset_hash, year_range, series, horizon, min_train_years, _df):
+    return walk_forward(_df, series, horizon, min_train_years)
+
+# =========================
+# LIVE TELEMETRY
+# =========================
+# One ingestion thread and ring buffer per source, shared by every session
+@st.cache_resource
+def get_telemetry_feed(source):
+    return TelemetryFeed(source)
+
+# Filters and aggregates run on LiveView, so the page only needs the newest rows
+# for the schema, palette and memory report; sessions at the same position share them
+LIVE_SAMPLE_ROWS = 10_000
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def live_sample(source, seq):
+    return get_telemetry_feed(source).buffer.since(seq - LIVE_SAMPLE_ROWS, seq)[0]
+
+# Each filter state folds in only the rows appended since any session last refreshed it
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_live_view(source, filters):
+    return LiveView(get_telemetry_feed(source).buffer, *filters)
+
+LIVE_INTERVALS = [1, 2, 5, 10, 30]
+
+def live_status(feed, shown_seq, interval):
+    stats = feed.stats()
+    st.caption(f"{stats['rate']:,.0f} records/s · {stats['rows']:,} of {feed.buffer.capacity:,} buffered · "
+               f"{stats['dropped']:,} malformed dropped")
+    if stats['error']:
+        st.error(f"❌ Ingestion stopped: {stats['error']}")
+    # Between full reruns only this caption refreshes; the page reruns once new rows are due
+    due = time.time() - st.session_state.get("live_refreshed", 0) >= 0.9 * interval
+    if feed.buffer.seq != shown_seq and due:
+        st.rerun()
 
 # =========================
 # SIDEBAR
@@ -441,17 +300,153 @@ with st.sidebar:
 
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("### 📂 Data Source")
-    uploaded_file = st.file_uploader("Upload Custom CSV (Optional)", type=["csv"], label_visibility="collapsed")
+    uploaded_file = st.file_uploader("Upload Custom Dataset (Optional)", type=["csv", "parquet", "arrow", "feather", "xlsx"],
+                                     label_visibility="collapsed")
+    stream_ingest = st.toggle("Streaming ingestion (large files)", key="stream_ingest",
+                              help="Parse the CSV in chunks and spill it to Parquet so memory stays bounded.")
+    dataset_path = os.environ.get("OVERSIGHT_DATASET")
     
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+        # Hash (and persist binary formats for memory-mapping) once per upload, not once per rerun
+        if st.session_state.get("upload_id") != uploaded_file.file_id:
+            st.session_state.upload_id = uploaded_file.file_id
+            st.session_state.upload_hash = stream_hash(uploaded_file)
+            st.session_state.upload_path = None
+            if source_format(uploaded_file.name) in ("parquet", "arrow"):
+                st.session_state.upload_path = persist_upload(uploaded_file, st.session_state.upload_hash,
+                                                              Path(uploaded_file.name).suffix.lower())
+        dataset_key = st.session_state.upload_hash
+        source = st.session_state.upload_path or uploaded_file
+        if stream_ingest and source_format(uploaded_file.name) == "csv":
+            source = spill_path(dataset_key)
+            dataset_key += ":stream"
+            if not source.exists():
+                progress_bar = st.progress(0.0, text="Ingesting...")
+                try:
+                    uploaded_file.seek(0)
+                    with profiler.span("ingest"):
+                        _, dropped = ingest_csv(uploaded_file, source, size=uploaded_file.size,
+                                                progress=lambda frac, n: progress_bar.progress(frac, text=f"Ingesting... {n:,} rows"))
+                except ValueError as e:
+                    progress_bar.empty()
+                    st.error(f"❌ {e}")
+                    st.stop()
+                progress_bar.empty()
+                if dropped:
+                    st.warning(f"⚠️ Skipped {dropped:,} invalid rows")
         st.success("✅ Custom data loaded")
+    elif dataset_path:
+        dataset_key, source = file_fingerprint(dataset_path), Path(dataset_path)
+        st.info(f"📁 Using {source.name}")
     else:
-        df = df_embedded.copy()
+        dataset_key, source = "embedded", None
         st.info("📊 Using embedded dataset")
 
-risk_mapping = {"Low": 1, "Medium": 2, "High": 3}
-df["Risk_Score"] = df["Risk_Level"].map(risk_mapping)
+    # Parquet sources can skip whole row groups outside the requested years
+    load_years = None
+    if isinstance(source, Path) and source_format(source) == "parquet":
+        bounds = parquet_year_bounds(source)
+        if bounds and bounds[0] < bounds[1]:
+            load_years = st.slider("Years to Load", bounds[0], bounds[1], bounds, key="load_years")
+
+    # Live mode swaps the loaded dataset for the telemetry ring buffer
+    telemetry_source = os.environ.get("OVERSIGHT_TELEMETRY")
+    live = False
+    if telemetry_source:
+        st.markdown("### 📡 Live Telemetry")
+        live = st.toggle("Live mode", key="live_mode", help=f"Stream supplier telemetry from {telemetry_source}.")
+
+    use_sql = st.toggle(f"SQL query engine ({available_engine()})", key="sql_engine", disabled=live,
+                        help="Push filters and aggregates down to an embedded database file instead of in-memory indexes.")
+    use_sql = use_sql and not live
+
+    live_seq = 0
+    if live:
+        live_interval = st.select_slider("Refresh every", LIVE_INTERVALS, value=2, key="live_interval",
+                                         format_func=lambda s: f"{s}s")
+        feed = get_telemetry_feed(telemetry_source)
+        live_seq = feed.buffer.seq
+        st.session_state.live_refreshed = time.time()
+        st.fragment(live_status, run_every=live_interval)(feed, live_seq, live_interval)
+        if not live_seq:
+            st.info("⏳ Waiting for telemetry records...")
+            st.stop()
+        with profiler.span("load"):
+            df = live_sample(telemetry_source, live_seq)
+        dataset_key = f"live:{telemetry_source}"
+        # Figures of earlier buffer positions can never be requested again
+        get_figure_cache().discard(lambda key: isinstance(key[0], (str, tuple))
+                                   and stable_key(frame_base(key[0])) == dataset_key
+                                   and frame_base(key[0]) != revision_key(dataset_key, live_seq))
+    else:
+        st.session_state.pop("live_limits", None)
+        with profiler.span("load"):
+            try:
+                df = load_dataset(dataset_key, source, load_years)
+            except (KeyError, ValueError, OSError) as e:
+                st.error(f"❌ Could not load dataset: {e}")
+                st.stop()
+
+    st.markdown("### 📈 Forecast")
+    forecast_source = st.radio("Predicted Gap source", ["Dataset column", "Linear fit"], key="forecast_source",
+                               horizontal=True, disabled=live,
+                               help="Use Predicted_Gap as loaded, or refit Year → ProductionGap per series.")
+    # Every live refresh is a new revision of the same stream
+    base_key = revision_key(dataset_key, live_seq)
+    if forecast_source == "Linear fit" and not live:
+        series_options = ["All rows"] + [c for c in SERIES_COLUMNS if c in df]
+        forecast_series = st.selectbox("One line per", series_options, key="forecast_series")
+        forecast_series = None if forecast_series == "All rows" else forecast_series
+        with profiler.span("forecast"):
+            forecaster = get_forecaster(dataset_key, load_years, forecast_series, df)
+        base_key = f"{dataset_key}:forecast:{forecast_series or 'all'}"
+        actuals = st.file_uploader("Append actuals (CSV)", type=["csv"], key="forecast_actuals",
+                                   help="New Year/ProductionGap rows update the fit in place instead of reloading.")
+        if actuals is not None:
+            try:
+                token, batch = stream_hash(actuals), pd.read_csv(actuals)
+                if forecaster.append(batch, token=token):
+                    forecast_actuals(dataset_key, load_years, forecast_series).append((token, batch))
+                    # Figures of earlier revisions can never be requested again
+                    get_figure_cache().discard(lambda key: isinstance(key[0], (str, tuple))
+                                               and stable_key(frame_base(key[0])) == base_key)
+            except (KeyError, ValueError) as e:
+                st.error(f"❌ Could not apply actuals: {e}")
+        df, forecast_revision = forecaster.snapshot()
+        forecast_fits = forecaster.fits()
+        # A rebuilt forecaster restarts its revisions, so the lineage keeps old keys from matching
+        base_key = revision_key(base_key, forecast_revision and f"{forecaster.lineage}.{forecast_revision}")
+        if forecast_revision:
+            st.caption(f"Revision {forecast_revision}: {len(df):,} rows")
+        if len(forecast_fits) == 1:
+            st.caption(f"Slope {forecast_fits['slope'].iloc[0]:,.1f} per year from {forecast_fits['n_obs'].iloc[0]:,} observed rows")
+        else:
+            st.caption(f"{len(forecast_fits):,} series fitted")
+
+    st.markdown("### 🎯 Risk Classification")
+    risk_source = st.radio("Risk source", ["Dataset column", "Rules engine"], key="risk_source", horizontal=True,
+                           disabled=live, help="Use the Risk_Level column as loaded, or classify every row from the thresholds below.")
+    risk_rules = None
+    if risk_source == "Rules engine" and not live:
+        gap_low, gap_high = float(df["Predicted_Gap"].min()), float(df["Predicted_Gap"].max())
+        defaults = tuple(min(max(DEFAULT_RULES[k], gap_low), gap_high) for k in ("medium_gap", "high_gap"))
+        medium_gap, high_gap = st.slider("Medium / High above Predicted Gap", gap_low, gap_high, defaults,
+                                         key="risk_gap_thresholds")
+        escalate_gap = st.number_input("Escalate when Production Gap >", value=DEFAULT_RULES["escalate_production_gap"],
+                                       step=10.0, key="risk_escalate_gap")
+        escalate_pct = st.slider("…and Backlog Change >", -1.0, 1.0, DEFAULT_RULES["escalate_backlog_pct"], 0.01,
+                                 key="risk_escalate_pct")
+        risk_rules = rules_key({"medium_gap": medium_gap, "high_gap": high_gap,
+                                "escalate_production_gap": escalate_gap, "escalate_backlog_pct": escalate_pct})
+
+# Rule-based risk replaces Risk_Level/Risk_Score; everything downstream is keyed by the rules too
+df_base = df
+frame_key = base_key
+if risk_rules is not None:
+    with profiler.span("classify"):
+        df = classified_frame(base_key, load_years, risk_rules, df_base)
+    frame_key = (base_key, risk_rules)
+risk_high_gap = dict(risk_rules or DEFAULT_RULES.items())['high_gap']
 
 # =========================
 # INTERACTIVE FILTERS
@@ -459,21 +454,30 @@ df["Risk_Score"] = df["Risk_Level"].map(risk_mapping)
 with st.sidebar:
     st.markdown("<br><br>", unsafe_allow_html=True)
     st.markdown("### 🔍 Interactive Filters")
+
+    # Live bounds are frozen when the stream is opened, otherwise every refresh would reset the sliders
+    limit_columns = ("Year", "Predicted_Gap", "Orders")
+    if live:
+        if "live_limits" not in st.session_state:
+            st.session_state.live_limits = {c: (int(low), int(high))
+                                            for c, (low, high) in feed.buffer.bounds(limit_columns).items()}
+        limits = st.session_state.live_limits
+        risk_options = list(RISK_MAPPING)
+    else:
+        limits = {c: (int(df[c].min()), int(df[c].max())) for c in limit_columns}
+        risk_options = df["Risk_Level"].unique()
     
-    year_range = st.slider("Year Range", int(df["Year"].min()), int(df["Year"].max()), 
-                           (int(df["Year"].min()), int(df["Year"].max())), key="year_filter")
+    year_range = st.slider("Year Range", *limits["Year"], limits["Year"], key="year_filter")
     
-    risk_levels = st.multiselect("Risk Levels", df["Risk_Level"].unique(), 
-                                 default=df["Risk_Level"].unique(), key="risk_filter")
+    risk_levels = st.multiselect("Risk Levels", risk_options, default=risk_options, key="risk_filter")
     
     st.markdown("---")
     st.markdown("#### 📊 Gap Analysis")
-    gap_threshold = st.slider("Show Gaps Greater Than", int(df["Predicted_Gap"].min()), int(df["Predicted_Gap"].max()), 
-                              int(df["Predicted_Gap"].min()), step=50, key="gap_filter")
+    gap_threshold = st.slider("Show Gaps Greater Than", *limits["Predicted_Gap"], limits["Predicted_Gap"][0],
+                              step=50, key="gap_filter")
     
     st.markdown("#### 📦 Order Volume")
-    order_min, order_max = st.slider("Order Range", int(df["Orders"].min()), int(df["Orders"].max()),
-                                     (int(df["Orders"].min()), int(df["Orders"].max())), key="order_filter")
+    order_min, order_max = st.slider("Order Range", *limits["Orders"], limits["Orders"], key="order_filter")
     
     st.markdown("---")
     st.markdown("#### ⚡ Quick Filters")
@@ -486,25 +490,114 @@ with st.sidebar:
         if st.button("🔄 Reset", use_container_width=True):
             st.rerun()
 
-# Apply filters
-df_filtered = df[
-    (df["Year"] >= year_range[0]) & (df["Year"] <= year_range[1]) &
-    (df["Risk_Level"].isin(risk_levels)) & (df["Predicted_Gap"] >= gap_threshold) &
-    (df["Orders"] >= order_min) & (df["Orders"] <= order_max)
-]
+# Apply filters through the per-dataset index instead of a full-column mask
+filters = (year_range, tuple(risk_levels), gap_threshold, (order_min, order_max))
+with profiler.span("filter"):
+    if live:
+        # A slider left at its edge stays open-ended, so later records beyond the frozen bounds still match
+        def open_bound(value, edge):
+            return None if value == edge else value
+        live_filters = ((open_bound(year_range[0], limits["Year"][0]), open_bound(year_range[1], limits["Year"][1])),
+                        tuple(risk_levels), open_bound(gap_threshold, limits["Predicted_Gap"][0]),
+                        (open_bound(order_min, limits["Orders"][0]), open_bound(order_max, limits["Orders"][1])))
+        live_view = get_live_view(telemetry_source, live_filters)
+        df_filtered, cube_stats = live_view.query(live_seq)
+    elif use_sql:
+        # Filters and aggregates run as SQL; only matching positions and grouped rows come back
+        sql_backend = build_sql_backend(base_key, load_years, df_base)
+        sql_positions = functools.partial(sql_backend.positions, risk_level=df["Risk_Level"])
+        df_filtered = filtered_view(frame_key, load_years, filters, "sql", df, sql_positions)
+    else:
+        if base_key == stable_key(base_key):
+            filter_index = build_filter_index(base_key, load_years, df_base)
+        else:
+            # Later forecast revisions patch the first revision's index rather than rebuild it
+            filter_index = build_filter_index(stable_key(base_key), load_years, forecaster.initial_frame)
+            filter_index = refreshed_filter_index(base_key, load_years, df_base, filter_index)
+        if risk_rules is not None:
+            filter_index = relabeled_filter_index(base_key, load_years, risk_rules, df, filter_index)
+        df_filtered = filtered_view(frame_key, load_years, filters, "index", df, filter_index.query)
+view_key = (frame_key, load_years, filters)
 
 with st.sidebar:
     st.markdown("---")
-    st.markdown(f"**Showing {len(df_filtered)} of {len(df)} records**")
+    n_records = min(live_seq, feed.buffer.capacity) if live else len(df)
+    st.markdown(f"**Showing {len(df_filtered)} of {n_records} records**")
+
+with st.sidebar:
+    st.markdown("---")
+    st.markdown("#### ⚙️ Performance")
+    lazy_views = st.toggle("Lazy analysis views", value=True, key="lazy_views",
+                           help="Build only the selected analysis tab; hidden tabs run when opened.")
+    figure_cache_status = st.empty()
+    # Hidden unless the page is opened with ?diagnostics=1
+    diagnostics = st.query_params.get("diagnostics") == "1"
+    if diagnostics:
+        with st.expander("🩺 Diagnostics"):
+            # tracemalloc is process-wide and slows every session while it runs
+            track = st.toggle("Track allocations (slower)", key="profile_allocations")
+            if track and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            elif not track and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            diagnostics_panel = st.container()
+    with st.expander("🧠 Memory Report"):
+        shared = get_dataset_store().report()
+        shared_bytes = sum(entry['bytes'] for entry in shared)
+        session_bytes = session_footprint(st.session_state)
+        st.caption(f"Shared datasets: {len(shared)} ({shared_bytes / 2**20:,.1f} MB, one copy per process)")
+        st.caption(f"This session: {session_bytes / 2**10:,.1f} KB of filter state and uploads")
+        st.caption(f"150 sessions ≈ {(shared_bytes + 150 * session_bytes) / 2**20:,.1f} MB "
+                   f"vs {150 * (shared_bytes + session_bytes) / 2**20:,.1f} MB with per-session copies")
+        # Per-column ratios barely move between live refreshes, so the report on the stream's first sample stands
+        columns = column_memory_report(stable_key(frame_key) if live else frame_key, load_years, df)
+        before, after = columns['before'].sum(), columns['after'].sum()
+        st.caption(f"Compact dtypes: {before / 2**20:,.2f} MB → {after / 2**20:,.2f} MB "
+                   f"({before / max(after, 1):.1f}× smaller)")
+        st.dataframe(columns, hide_index=True, use_container_width=True,
+                     column_config={'before': st.column_config.NumberColumn("before (B)", format="%d"),
+                                    'after': st.column_config.NumberColumn("after (B)", format="%d"),
+                                    'ratio': st.column_config.NumberColumn(format="%.1f×")})
+
+# =========================
+# ALERT STATE
+# =========================
+# Shared across sessions and independent of the sidebar filters; the header
+# reads its counters and the alert box narrows them to the filtered subjects,
+# neither rescanning the data
+with profiler.span("alerts"):
+    alert_series = next((c for c in SERIES_COLUMNS if c in df), None)
+    alert_engine = get_alert_engine(stable_key(base_key), load_years, alert_series)
+    if live:
+        alert_engine.follow(feed.buffer, live_seq)
+    else:
+        alert_engine.sync(df, token=frame_key)
+    alert_summary = alert_engine.summary()
+health = alert_summary['health']
+health_color = "#86EFAC" if health >= 90 else "#FCD34D" if health >= 70 else "#FCA5A5"
 
 # =========================
 # HEADER
 # =========================
-st.markdown("""
+system_status, status_color, last_updated = "OPERATIONAL", "#86EFAC", "November 16, 2025 | 14:32 UTC"
+if live:
+    # Status and timestamp follow the feed: stalled once no record has arrived for a few refreshes
+    feed_stats = feed.stats()
+    received = feed_stats['last_received']
+    if feed_stats['error']:
+        system_status, status_color = "OFFLINE", "#FCA5A5"
+    elif received is None or time.time() - received > max(3 * live_interval, 10):
+        system_status, status_color = "STALLED", "#FCD34D"
+    else:
+        system_status = "LIVE"
+    if received is not None:
+        last_updated = datetime.fromtimestamp(received, timezone.utc).strftime("%B %d, %Y | %H:%M:%S UTC")
+
+st.markdown(f"""
 <div class='dashboard-header'>
     <div class='header-top-bar'>
-        <div>System Status: <span style='color: #86EFAC; font-weight: 600;'>● OPERATIONAL</span></div>
-        <div>Last Updated: November 16, 2025 | 14:32 UTC</div>
+        <div>System Status: <span style='color: {status_color}; font-weight: 600;'>● {system_status}</span></div>
+        <div>Last Updated: {last_updated}</div>
     </div>
     <div class='header-main'>
         <div class='header-left'>
@@ -520,11 +613,11 @@ st.markdown("""
         <div class='header-right'>
             <div class='header-stat'>
                 <div class='header-stat-label'>Active Alerts</div>
-                <div class='header-stat-value' style='color: #FCA5A5;'>3</div>
+                <div class='header-stat-value' style='color: #FCA5A5;'>{alert_summary['active']:,}</div>
             </div>
             <div class='header-stat'>
                 <div class='header-stat-label'>System Health</div>
-                <div class='header-stat-value' style='color: #86EFAC;'>98%</div>
+                <div class='header-stat-value' style='color: {health_color};'>{health:.0f}%</div>
             </div>
         </div>
     </div>
@@ -534,99 +627,188 @@ st.markdown("""
 # =========================
 # METRICS
 # =========================
-col1, col2, col3, col4 = st.columns(4)
-
-total_gap = df_filtered['Predicted_Gap'].sum()
-total_orders = df_filtered['Orders'].sum()
-avg_orders = df_filtered['Orders'].mean()
-high_risk_count = len(df_filtered[df_filtered['Risk_Level'] == 'High'])
+# All card and risk-breakdown figures come from one cube lookup
+# (the live view already maintains them incrementally alongside df_filtered)
+with profiler.span("metrics"):
+    if use_sql:
+        cube_stats = sql_backend.query(*filters, risk_level=df["Risk_Level"])
+    elif not live:
+        metrics_cube = build_metrics_cube(base_key, load_years, df_base)
+        cube_stats = metrics_cube.query(*filters, risk_level=df["Risk_Level"])
+
+def kpi_cards(df, cube_stats):
+    col1, col2, col3, col4 = st.columns(4)
+
+    total_gap = cube_stats['total_gap']
+    total_orders = cube_stats['total_orders']
+    avg_orders = cube_stats['avg_orders']
+    high_risk_count = cube_stats['high_risk_count']
+
+    if cube_stats['critical_pos'] is not None:
+        critical_year_row = df.iloc[cube_stats['critical_pos']]
+    else:
+        critical_year_row = pd.Series({'Year': 'N/A', 'Predicted_Gap': 0})
 
-if len(df_filtered) > 0:
-    critical_year_row = df_filtered.loc[df_filtered['Risk_Score'].idxmax()]
-else:
-    critical_year_row = pd.Series({'Year': 'N/A', 'Predicted_Gap': 0})
+    with col1:
+        st.markdown(f"""<div class='metric-card'><div class='metric-label'>Total Predicted Gap</div>
+        <div class='metric-value'>{total_gap:,.0f}</div>
+        <div class='metric-delta'>{(total_gap/total_orders*100 if total_orders > 0 else 0):.1f}% of total orders</div></div>""", unsafe_allow_html=True)
 
-with col1:
-    st.markdown(f"""<div class='metric-card'><div class='metric-label'>Total Predicted Gap</div>
-    <div class='metric-value'>{total_gap:,.0f}</div>
-    <div class='metric-delta'>{(total_gap/total_orders*100 if total_orders > 0 else 0):.1f}% of total orders</div></div>""", unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"""<div class='metric-card'><div class='metric-label'>High-Risk Periods</div>
+        <div class='metric-value'>{high_risk_count}</div>
+        <div class='metric-delta'>{(high_risk_count/cube_stats['count']*100 if cube_stats['count'] > 0 else 0):.0f}% of timeline</div></div>""", unsafe_allow_html=True)
 
-with col2:
-    st.markdown(f"""<div class='metric-card'><div class='metric-label'>High-Risk Periods</div>
-    <div class='metric-value'>{high_risk_count}</div>
-    <div class='metric-delta'>{(high_risk_count/len(df_filtered)*100 if len(df_filtered) > 0 else 0):.0f}% of timeline</div></div>""", unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"""<div class='metric-card'><div class='metric-label'>Critical Year</div>
+        <div class='metric-value'>{critical_year_row['Year']}</div>
+        <div class='metric-delta'>Gap: {critical_year_row['Predicted_Gap']:,} units</div></div>""", unsafe_allow_html=True)
 
-with col3:
-    st.markdown(f"""<div class='metric-card'><div class='metric-label'>Critical Year</div>
-    <div class='metric-value'>{critical_year_row['Year']}</div>
-    <div class='metric-delta'>Gap: {critical_year_row['Predicted_Gap']:,} units</div></div>""", unsafe_allow_html=True)
+    with col4:
+        st.markdown(f"""<div class='metric-card'><div class='metric-label'>Total Orders</div>
+        <div class='metric-value'>{total_orders:,}</div>
+        <div class='metric-delta'>Average: {avg_orders:.0f} per year</div></div>""", unsafe_allow_html=True)
 
-with col4:
-    st.markdown(f"""<div class='metric-card'><div class='metric-label'>Total Orders</div>
-    <div class='metric-value'>{total_orders:,}</div>
-    <div class='metric-delta'>Average: {avg_orders:.0f} per year</div></div>""", unsafe_allow_html=True)
+with profiler.span("kpis"):
+    # Live stats locate the critical row in the filtered frame rather than the whole buffer
+    kpi_cards(df_filtered if live else df, cube_stats)
 
 # =========================
 # ALERT
 # =========================
-high_risk_years = df_filtered[df_filtered['Risk_Level'] == 'High']['Year'].tolist()
-if high_risk_years:
-    st.markdown(f"""<div class='alert-box critical'><h4>⚠️ CRITICAL ALERT: High-Risk Periods Detected</h4>
-    <p style='margin: 0; font-size: 0.875rem; line-height: 1.6;'><strong>Affected Years:</strong> {', '.join(map(str, high_risk_years))}<br>
-    <strong>Action Required:</strong> Immediate supplier oversight and capacity planning review needed.</p></div>""", unsafe_allow_html=True)
+ALERT_BOX_LIMIT = 50
+
+with profiler.span("alert"):
+    # Only subjects inside the sidebar's year range and risk selection; the live stream keeps its open bounds
+    alert_filters = {"years": live_filters[0] if live else year_range, "risk_levels": tuple(risk_levels)}
+    critical_in_view = alert_engine.count('critical', **alert_filters) if alert_summary['critical'] else 0
+    if critical_in_view:
+        # Newest critical alerts grouped by rule; the engine keeps them, so this never touches the rows
+        shown = alert_engine.recent('critical', limit=ALERT_BOX_LIMIT, **alert_filters)
+        affected = {}
+        for alert in shown:
+            subject = str(alert['year']) if alert['series'] is None else f"{alert['series']} ({alert['year']})"
+            affected.setdefault(alert['label'], []).append(subject)
+        lines = "".join(f"<strong>{label}:</strong> {', '.join(subjects)}<br>" for label, subjects in affected.items())
+        if critical_in_view > len(shown):
+            lines += f"<em>…and {critical_in_view - len(shown):,} more</em><br>"
+        st.markdown(f"""<div class='alert-box critical'><h4>⚠️ CRITICAL ALERT: High-Risk Periods Detected</h4>
+        <p style='margin: 0; font-size: 0.875rem; line-height: 1.6;'>{lines}
+        <strong>Action Required:</strong> Immediate supplier oversight and capacity planning review needed.</p></div>""", unsafe_allow_html=True)
 
 # =========================
 # INTERACTIVE TABS
 # =========================
 st.markdown("<h2 class='section-header'>ANALYSIS VIEWS</h2>", unsafe_allow_html=True)
 
-tab1, tab2, tab3, tab4 = st.tabs(["📈 Production Trends", "🎯 Correlation Analysis", "📊 Risk Breakdown", "🗓️ Year-by-Year"])
+# Sections that own widgets run as fragments: changing a chart option reruns
+# only that section against the shared filtered view, not the whole script.
+@st.fragment
+@profiler.profiled("tab:trends")
+def production_trends_view(view_key, df_filtered, cube_stats, high_gap):
+    import plotly.graph_objects as go
 
-with tab1:
+    risk_counts = cube_stats['risk_counts']
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
         chart_type = st.radio("Chart Type:", ["Line Chart", "Area Chart", "Bar Chart"], horizontal=True)
         
-        fig1 = go.Figure()
+        # Above the point budget, series are downsampled server-side and drawn with WebGL;
+        # narrowing the zoom window re-queries that range at full budget resolution.
+        large = len(df_filtered) > TREND_POINT_BUDGET
+        zoom = None
+        if large:
+            year_lo, year_hi = int(df_filtered['Year'].min()), int(df_filtered['Year'].max())
+            if year_lo < year_hi:
+                zoom = st.slider("Zoom (Year)", year_lo, year_hi, (year_lo, year_hi), key="trend_zoom")
+                st.caption(f"Large-data mode: {len(df_filtered):,} rows downsampled to {TREND_POINT_BUDGET:,} points per series")
         
-        if chart_type == "Line Chart":
-            fig1.add_trace(go.Scatter(x=df_filtered['Year'], y=df_filtered['ProductionGap'], name='Actual Gap',
-                                     mode='lines+markers', line=dict(color='#64748B', width=3), marker=dict(size=8)))
-            fig1.add_trace(go.Scatter(x=df_filtered['Year'], y=df_filtered['Predicted_Gap'], name='Predicted Gap',
-                                     mode='lines+markers', line=dict(color='#0047AB', width=4), marker=dict(size=10, symbol='diamond')))
-        elif chart_type == "Area Chart":
-            fig1.add_trace(go.Scatter(x=df_filtered['Year'], y=df_filtered['ProductionGap'], name='Actual Gap',
-                                     fill='tozeroy', fillcolor='rgba(100, 116, 139, 0.3)', line=dict(color='#64748B')))
-            fig1.add_trace(go.Scatter(x=df_filtered['Year'], y=df_filtered['Predicted_Gap'], name='Predicted Gap',
-                                     fill='tozeroy', fillcolor='rgba(0, 71, 171, 0.3)', line=dict(color='#0047AB')))
-        else:
-            fig1.add_trace(go.Bar(x=df_filtered['Year'], y=df_filtered['ProductionGap'], name='Actual Gap', marker_color='#64748B'))
-            fig1.add_trace(go.Bar(x=df_filtered['Year'], y=df_filtered['Predicted_Gap'], name='Predicted Gap', marker_color='#0047AB'))
+        def build_trend():
+            view = df_filtered
+            if zoom is not None:
+                view = df_filtered[(df_filtered['Year'] >= zoom[0]) & (df_filtered['Year'] <= zoom[1])]
+            if large:
+                reduce = minmax if chart_type == "Bar Chart" else lttb
+                actual_x, actual_y = reduce(view['Year'], view['ProductionGap'], TREND_POINT_BUDGET)
+                predicted_x, predicted_y = reduce(view['Year'], view['Predicted_Gap'], TREND_POINT_BUDGET)
+            else:
+                actual_x, actual_y = view['Year'], view['ProductionGap']
+                predicted_x, predicted_y = view['Year'], view['Predicted_Gap']
+            scatter = go.Scattergl if large else go.Scatter
+            
+            fig1 = go.Figure()
+        
+            if chart_type == "Line Chart":
+                fig1.add_trace(scatter(x=actual_x, y=actual_y, name='Actual Gap',
+                                       mode='lines+markers', line=dict(color='#64748B', width=3), marker=dict(size=8)))
+                fig1.add_trace(scatter(x=predicted_x, y=predicted_y, name='Predicted Gap',
+                                       mode='lines+markers', line=dict(color='#0047AB', width=4), marker=dict(size=10, symbol='diamond')))
+            elif chart_type == "Area Chart":
+                fig1.add_trace(scatter(x=actual_x, y=actual_y, name='Actual Gap',
+                                       fill='tozeroy', fillcolor='rgba(100, 116, 139, 0.3)', line=dict(color='#64748B')))
+                fig1.add_trace(scatter(x=predicted_x, y=predicted_y, name='Predicted Gap',
+                                       fill='tozeroy', fillcolor='rgba(0, 71, 171, 0.3)', line=dict(color='#0047AB')))
+            else:
+                fig1.add_trace(go.Bar(x=actual_x, y=actual_y, name='Actual Gap', marker_color='#64748B'))
+                fig1.add_trace(go.Bar(x=predicted_x, y=predicted_y, name='Predicted Gap', marker_color='#0047AB'))
         
-        fig1.update_layout(title='Production Gap: Actual vs Predicted', xaxis_title='Year', yaxis_title='Gap (Units)',
-                          template='plotly_white', height=450, hovermode='x unified',
-                          legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-        st.plotly_chart(fig1, use_container_width=True)
+            fig1.update_layout(title='Production Gap: Actual vs Predicted', xaxis_title='Year', yaxis_title='Gap (Units)',
+                              template='plotly_white', height=450, hovermode='x unified',
+                              legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+            return fig1
+        show_chart((*view_key, 'trend', chart_type, zoom), build_trend)
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
         st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
         st.markdown("#### Risk Level Distribution")
-        risk_counts = df_filtered['Risk_Level'].value_counts()
-        
         for level in ['High', 'Medium', 'Low']:
             if level in risk_counts.index:
                 count = risk_counts[level]
-                perc = (count / len(df_filtered)) * 100
+                perc = (count / cube_stats['count']) * 100
                 color = {'High': '#DC2626', 'Medium': '#F59E0B', 'Low': '#10B981'}[level]
                 st.markdown(f"""<div class='risk-item'><div class='risk-header'>
                 <span class='risk-label'>{level} Risk</span><span class='risk-count' style='color:{color}'>{count} ({perc:.0f}%)</span></div>
                 <div class='risk-bar-bg'><div class='risk-bar-fill' style='width:{perc}%; background:{color};'></div></div></div>""", unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
-with tab2:
+    if st.toggle("🎲 Simulate forward gap scenarios", key="scenario_bands",
+                 help="Monte Carlo bands around the trend from output-shortfall and order-intake draws."):
+        col1, col2 = st.columns([3, 1])
+        n_scenarios = col2.select_slider("Scenarios", SCENARIO_COUNTS, value=1_000_000, key="scenario_count",
+                                         format_func=lambda n: f"{n:,}")
+        seed = col2.number_input("Seed", 0, 2**31 - 1, 0, key="scenario_seed")
+        bands = scenario_bands(view_key, n_scenarios, seed, high_gap, df_filtered)
+        if bands is None:
+            col1.info("No future years to simulate in the current filter.")
+            return
+
+        def build_fan():
+            years, (q05, q25, q50, q75, q95) = bands['years'], bands['quantiles']
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=years, y=q95, line=dict(width=0), showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=years, y=q05, fill='tonexty', fillcolor='rgba(0, 71, 171, 0.15)',
+                                     line=dict(width=0), name='5–95%'))
+            fig.add_trace(go.Scatter(x=years, y=q75, line=dict(width=0), showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=years, y=q25, fill='tonexty', fillcolor='rgba(0, 71, 171, 0.35)',
+                                     line=dict(width=0), name='25–75%'))
+            fig.add_trace(go.Scatter(x=years, y=q50, name='Median', mode='lines+markers', line=dict(color='#0047AB', width=3)))
+            fig.add_hline(y=high_gap, line_dash='dash', line_color='#DC2626', annotation_text='High risk')
+            fig.update_layout(title=f'Forward Production Gap: {n_scenarios:,} Scenarios', xaxis_title='Year',
+                              yaxis_title='Gap (Units)', template='plotly_white', height=400, hovermode='x unified')
+            return fig
+        with col1:
+            show_chart((*view_key, 'scenarios', n_scenarios, seed, high_gap), build_fan)
+        for column, year, p_high in zip(st.columns(len(bands['years'])), bands['years'], bands['p_high']):
+            column.metric(f"P(High) {int(year)}", f"{p_high:.0%}")
+
+@st.fragment
+@profiler.profiled("tab:correlation")
+def correlation_view(view_key, df_filtered):
+    import plotly.graph_objects as go
+
     st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
     col1, col2 = st.columns(2)
     with col1:
@@ -634,43 +816,89 @@ with tab2:
     with col2:
         scatter_size = st.selectbox("Size by:", ["Risk Score", "Orders", "Predicted Gap"])
     
-    color_col = df_filtered['Risk_Score'] if scatter_color == "Risk Level" else df_filtered['Year']
-    colorscale = [[0, '#10B981'], [0.5, '#F59E0B'], [1, '#DC2626']] if scatter_color == "Risk Level" else [[0, '#001D3D'], [0.5, '#0047AB'], [1, '#0066CC']]
-    size_col = df_filtered['Risk_Score']*12 if scatter_size == "Risk Score" else df_filtered['Orders']/10 if scatter_size == "Orders" else df_filtered['Predicted_Gap']/10
+    # Past the point budget one marker per row stops scaling; switch to a binned density grid
+    dense = len(df_filtered) > SCATTER_POINT_BUDGET
+    if dense:
+        st.caption(f"Density mode: {len(df_filtered):,} rows binned on a {DENSITY_BINS}×{DENSITY_BINS} grid; "
+                   f"bins are colored by mean {'Risk Score' if scatter_color == 'Risk Level' else 'Year'}")
     
-    fig_scatter = go.Figure(data=go.Scatter(x=df_filtered['Orders'], y=df_filtered['Predicted_Gap'], mode='markers',
-                                           marker=dict(size=size_col, color=color_col, colorscale=colorscale, showscale=True, colorbar=dict(title=scatter_color)),
-                                           text=df_filtered['Year'], hovertemplate='<b>Year %{text}</b><br>Orders: %{x:,}<br>Gap: %{y:,}<extra></extra>'))
-    fig_scatter.update_layout(title='Orders vs Predicted Gap Analysis', xaxis_title='Orders', yaxis_title='Predicted Gap',
-                             template='plotly_white', height=500, hovermode='closest')
-    st.plotly_chart(fig_scatter, use_container_width=True)
+    def build_density():
+        color_col = 'Risk_Score' if scatter_color == "Risk Level" else 'Year'
+        colorscale = [[0, '#10B981'], [0.5, '#F59E0B'], [1, '#DC2626']] if scatter_color == "Risk Level" else [[0, '#001D3D'], [0.5, '#0047AB'], [1, '#0066CC']]
+        x_centers, y_centers, counts, mean = binned_density(df_filtered['Orders'], df_filtered['Predicted_Gap'],
+                                                            df_filtered[color_col], DENSITY_BINS)
+        fig_density = go.Figure(data=go.Heatmap(x=x_centers, y=y_centers, z=mean, customdata=counts, colorscale=colorscale,
+                                                colorbar=dict(title=scatter_color), hoverongaps=False,
+                                                hovertemplate='Orders: %{x:,.0f}<br>Gap: %{y:,.0f}<br>Rows: %{customdata:,}<br>'
+                                                              f'Mean {scatter_color}: ' + '%{z:.2f}<extra></extra>'))
+        fig_density.update_layout(title='Orders vs Predicted Gap Analysis', xaxis_title='Orders', yaxis_title='Predicted Gap',
+                                  template='plotly_white', height=500)
+        return fig_density
+    
+    def build_scatter():
+        color_col = df_filtered['Risk_Score'] if scatter_color == "Risk Level" else df_filtered['Year']
+        colorscale = [[0, '#10B981'], [0.5, '#F59E0B'], [1, '#DC2626']] if scatter_color == "Risk Level" else [[0, '#001D3D'], [0.5, '#0047AB'], [1, '#0066CC']]
+        size_col = df_filtered['Risk_Score']*12 if scatter_size == "Risk Score" else df_filtered['Orders']/10 if scatter_size == "Orders" else df_filtered['Predicted_Gap']/10
+    
+        fig_scatter = go.Figure(data=go.Scatter(x=df_filtered['Orders'], y=df_filtered['Predicted_Gap'], mode='markers',
+                                               marker=dict(size=size_col, color=color_col, colorscale=colorscale, showscale=True, colorbar=dict(title=scatter_color)),
+                                               text=df_filtered['Year'], hovertemplate='<b>Year %{text}</b><br>Orders: %{x:,}<br>Gap: %{y:,}<extra></extra>'))
+        fig_scatter.update_layout(title='Orders vs Predicted Gap Analysis', xaxis_title='Orders', yaxis_title='Predicted Gap',
+                                 template='plotly_white', height=500, hovermode='closest')
+        return fig_scatter
+    if dense:
+        show_chart((*view_key, 'density', scatter_color), build_density)
+    else:
+        show_chart((*view_key, 'scatter', scatter_color, scatter_size), build_scatter)
+    
+    st.markdown("#### Correlation Matrix")
+    
+    def build_correlation():
+        corr = correlation_matrix(df_filtered)
+        fig_corr = go.Figure(data=go.Heatmap(z=corr.values, x=corr.columns, y=corr.index, zmin=-1, zmax=1,
+                                             colorscale=[[0, '#DC2626'], [0.5, '#F8F9FA'], [1, '#0047AB']],
+                                             text=corr.values, texttemplate='%{text:.2f}', hoverongaps=False))
+        fig_corr.update_layout(height=500, template='plotly_white', yaxis=dict(autorange='reversed'))
+        return fig_corr
+    show_chart((*view_key, 'correlation'), build_correlation)
     st.markdown("</div>", unsafe_allow_html=True)
 
-with tab3:
+@profiler.profiled("tab:risk_breakdown")
+def risk_breakdown_view(view_key, cube_stats):
+    import plotly.graph_objects as go
+
+    risk_counts, gap_by_risk = cube_stats['risk_counts'], cube_stats['gap_by_risk']
     st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### Risk Distribution by Count")
-        risk_counts = df_filtered['Risk_Level'].value_counts()
-        fig_pie = go.Figure(data=[go.Pie(labels=risk_counts.index, values=risk_counts.values,
-                                        marker=dict(colors=['#DC2626', '#F59E0B', '#10B981']), hole=0.4,
-                                        textinfo='label+percent', textfont=dict(size=14))])
-        fig_pie.update_layout(height=400, showlegend=True, template='plotly_white')
-        st.plotly_chart(fig_pie, use_container_width=True)
+        def build_pie():
+            fig_pie = go.Figure(data=[go.Pie(labels=risk_counts.index, values=risk_counts.values,
+                                            marker=dict(colors=['#DC2626', '#F59E0B', '#10B981']), hole=0.4,
+                                            textinfo='label+percent', textfont=dict(size=14))])
+            fig_pie.update_layout(height=400, showlegend=True, template='plotly_white')
+            return fig_pie
+        show_chart((*view_key, 'risk_pie'), build_pie)
     
     with col2:
         st.markdown("#### Gap by Risk Level")
-        gap_by_risk = df_filtered.groupby('Risk_Level')['Predicted_Gap'].sum().reset_index()
-        fig_bar = go.Figure(data=[go.Bar(x=gap_by_risk['Risk_Level'], y=gap_by_risk['Predicted_Gap'],
-                                        marker_color=['#10B981', '#F59E0B', '#DC2626'],
-                                        text=gap_by_risk['Predicted_Gap'], texttemplate='%{text:,.0f}', textposition='outside')])
-        fig_bar.update_layout(height=400, xaxis_title='Risk Level', yaxis_title='Total Predicted Gap',
-                            template='plotly_white', showlegend=False)
-        st.plotly_chart(fig_bar, use_container_width=True)
+        def build_gap_by_risk():
+            fig_bar = go.Figure(data=[go.Bar(x=gap_by_risk['Risk_Level'], y=gap_by_risk['Predicted_Gap'],
+                                            marker_color=['#10B981', '#F59E0B', '#DC2626'],
+                                            text=gap_by_risk['Predicted_Gap'], texttemplate='%{text:,.0f}', textposition='outside')])
+            fig_bar.update_layout(height=400, xaxis_title='Risk Level', yaxis_title='Total Predicted Gap',
+                                template='plotly_white', showlegend=False)
+            return fig_bar
+        show_chart((*view_key, 'gap_by_risk'), build_gap_by_risk)
     st.markdown("</div>", unsafe_allow_html=True)
 
-with tab4:
+@st.fragment
+@profiler.profiled("tab:year_by_year")
+def year_by_year_view(view_key, df_filtered):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
     selected_year = st.selectbox("Select Year for Detailed View:", df_filtered['Year'].unique())
     year_data = df_filtered[df_filtered['Year'] == selected_year].iloc[0]
@@ -687,59 +915,145 @@ with tab4:
         st.metric("Prediction Variance", f"{variance:,.0f}", f"{(variance/year_data['ProductionGap']*100 if year_data['ProductionGap'] != 0 else 0):.1f}%")
     
     st.markdown("#### Historical Comparison")
-    fig_compare = make_subplots(specs=[[{"secondary_y": True}]])
-    fig_compare.add_trace(go.Bar(x=df_filtered['Year'], y=df_filtered['Orders'], name='Orders', marker_color='#0047AB'), secondary_y=False)
-    fig_compare.add_trace(go.Scatter(x=df_filtered['Year'], y=df_filtered['Predicted_Gap'], name='Predicted Gap',
-                                    mode='lines+markers', marker=dict(size=10, color='#DC2626'), line=dict(width=3, color='#DC2626')), secondary_y=True)
-    fig_compare.update_yaxes(title_text="Orders", secondary_y=False)
-    fig_compare.update_yaxes(title_text="Predicted Gap", secondary_y=True)
-    fig_compare.update_layout(height=400, template='plotly_white', hovermode='x unified',
-                             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-    st.plotly_chart(fig_compare, use_container_width=True)
+    def build_compare():
+        fig_compare = make_subplots(specs=[[{"secondary_y": True}]])
+        fig_compare.add_trace(go.Bar(x=df_filtered['Year'], y=df_filtered['Orders'], name='Orders', marker_color='#0047AB'), secondary_y=False)
+        fig_compare.add_trace(go.Scatter(x=df_filtered['Year'], y=df_filtered['Predicted_Gap'], name='Predicted Gap',
+                                        mode='lines+markers', marker=dict(size=10, color='#DC2626'), line=dict(width=3, color='#DC2626')), secondary_y=True)
+        fig_compare.update_yaxes(title_text="Orders", secondary_y=False)
+        fig_compare.update_yaxes(title_text="Predicted Gap", secondary_y=True)
+        fig_compare.update_layout(height=400, template='plotly_white', hovermode='x unified',
+                                 legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+        return fig_compare
+    show_chart((*view_key, 'compare'), build_compare)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+@st.fragment
+@profiler.profiled("tab:backtest")
+def backtest_view(base_key, year_range, df_base):
+    import plotly.graph_objects as go
+
+    st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    series_options = ["All rows"] + [c for c in SERIES_COLUMNS if c in df_base]
+    series = col1.selectbox("One line per", series_options, key="backtest_series")
+    series = None if series == "All rows" else series
+    horizon = col2.number_input("Horizon (years)", 1, 5, 1, key="backtest_horizon")
+    min_train_years = col3.number_input("Minimum training years", 2, 10, 3, key="backtest_min_train")
+    by_cutoff, by_series = backtest_scores(base_key, year_range, series, horizon, min_train_years, df_base)
+    if by_cutoff.empty:
+        st.info("Not enough observed years for a walk-forward backtest.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+
+    summary = backtest_summary(by_cutoff)
+    # The nearest horizon scored; 1 year ahead unless no cutoff is followed by the next year
+    nearest = summary[summary['horizon'] == 1]
+    nearest = (nearest if len(nearest) else summary).iloc[0]
+    ahead = f"{int(nearest['horizon'])} year{'s' if nearest['horizon'] > 1 else ''} ahead"
+    col1, col2, col3 = st.columns(3)
+    col1.metric(f"MAE ({ahead})", f"{nearest['mae']:,.1f}")
+    col2.metric(f"MAPE ({ahead})", "n/a" if pd.isna(nearest['mape']) else f"{nearest['mape']:.1f}%")
+    col3.metric(f"Bias ({ahead})", f"{nearest['bias']:+,.1f}")
+
+    def build_backtest():
+        fig = go.Figure()
+        for h, scores in by_cutoff.groupby('horizon'):
+            fig.add_trace(go.Scatter(x=scores['cutoff'], y=scores['mae'], name=f'{h} year ahead', mode='lines+markers'))
+        fig.update_layout(title='Walk-forward MAE by Training Cutoff', xaxis_title='Last training year',
+                          yaxis_title='MAE (Units)', template='plotly_white', height=400, hovermode='x unified')
+        return fig
+    show_chart((base_key, year_range, 'backtest', series, horizon, min_train_years), build_backtest)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### Error by Horizon")
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+    with col2:
+        st.markdown("#### Least Accurate Series" if series else "#### Error by Cutoff")
+        st.dataframe(by_series.head(20) if series else by_cutoff, hide_index=True, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+# In lazy mode the tabs track selection, so .open is False for hidden tabs and
+# their figures are never built; in eager mode .open is None and all tabs render.
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Production Trends", "🎯 Correlation Analysis", "📊 Risk Breakdown",
+                                       "🗓️ Year-by-Year", "🧪 Backtest"],
+                                       key="analysis_tab", on_change="rerun" if lazy_views else "ignore")
+
+with tab1:
+    if tab1.open is not False:
+        production_trends_view(view_key, df_filtered, cube_stats, risk_high_gap)
+with tab2:
+    if tab2.open is not False:
+        correlation_view(view_key, df_filtered)
+with tab3:
+    if tab3.open is not False:
+        risk_breakdown_view(view_key, cube_stats)
+with tab4:
+    if tab4.open is not False:
+        year_by_year_view(view_key, df_filtered)
+with tab5:
+    if tab5.open is not False:
+        backtest_view(base_key, load_years, df_base)
+
 # =========================
 # ROADMAP
 # =========================
 st.markdown("<h2 class='section-header'>IMPLEMENTATION ROADMAP 2025</h2>", unsafe_allow_html=True)
-st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
 
-phases = pd.DataFrame([
-    dict(Phase='Phase 1: Planning & Vendor Setup', Start='2025-01-01', Finish='2025-02-28', Category='Planning', Progress=100),
-    dict(Phase='Phase 2: Telemetry Installation', Start='2025-03-01', Finish='2025-04-30', Category='Implementation', Progress=75),
-    dict(Phase='Phase 3: Supplier Integration', Start='2025-05-01', Finish='2025-06-30', Category='Integration', Progress=45),
-    dict(Phase='Phase 4: Pilot & Analytics', Start='2025-07-01', Finish='2025-10-31', Category='Analytics', Progress=20),
-    dict(Phase='Phase 5: Dashboard Deployment', Start='2025-11-01', Finish='2025-12-15', Category='Deployment', Progress=0),
-    dict(Phase='Phase 6: Review & Scale Decision', Start='2025-12-16', Finish='2025-12-31', Category='Review', Progress=0)
-])
+# Constant roadmap data, built once per process and treated as read-only
+@st.cache_resource
+def roadmap_phases():
+    phases = pd.DataFrame([
+        dict(Phase='Phase 1: Planning & Vendor Setup', Start='2025-01-01', Finish='2025-02-28', Category='Planning', Progress=100),
+        dict(Phase='Phase 2: Telemetry Installation', Start='2025-03-01', Finish='2025-04-30', Category='Implementation', Progress=75),
+        dict(Phase='Phase 3: Supplier Integration', Start='2025-05-01', Finish='2025-06-30', Category='Integration', Progress=45),
+        dict(Phase='Phase 4: Pilot & Analytics', Start='2025-07-01', Finish='2025-10-31', Category='Analytics', Progress=20),
+        dict(Phase='Phase 5: Dashboard Deployment', Start='2025-11-01', Finish='2025-12-15', Category='Deployment', Progress=0),
+        dict(Phase='Phase 6: Review & Scale Decision', Start='2025-12-16', Finish='2025-12-31', Category='Review', Progress=0)
+    ])
+
+    phases["Start"] = pd.to_datetime(phases["Start"])
+    phases["Finish"] = pd.to_datetime(phases["Finish"])
+
+    colors = {'Planning': '#001D3D', 'Implementation': '#0047AB', 'Integration': '#0066CC',
+              'Analytics': '#3B82F6', 'Deployment': '#60A5FA', 'Review': '#93C5FD'}
+    return phases, colors
+
+@st.fragment
+@profiler.profiled("roadmap")
+def roadmap_section():
+    import plotly.express as px
 
-phases["Start"] = pd.to_datetime(phases["Start"])
-phases["Finish"] = pd.to_datetime(phases["Finish"])
+    st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
 
-selected_phase = st.selectbox("Select Phase for Details:", phases['Phase'].tolist())
-phase_info = phases[phases['Phase'] == selected_phase].iloc[0]
+    phases, colors = roadmap_phases()
 
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.metric("Progress", f"{phase_info['Progress']}%")
-with col2:
-    st.metric("Start Date", phase_info['Start'].strftime('%Y-%m-%d'))
-with col3:
-    st.metric("End Date", phase_info['Finish'].strftime('%Y-%m-%d'))
+    selected_phase = st.selectbox("Select Phase for Details:", phases['Phase'].tolist())
+    phase_info = phases[phases['Phase'] == selected_phase].iloc[0]
 
-colors = {'Planning': '#001D3D', 'Implementation': '#0047AB', 'Integration': '#0066CC',
-          'Analytics': '#3B82F6', 'Deployment': '#60A5FA', 'Review': '#93C5FD'}
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Progress", f"{phase_info['Progress']}%")
+    with col2:
+        st.metric("Start Date", phase_info['Start'].strftime('%Y-%m-%d'))
+    with col3:
+        st.metric("End Date", phase_info['Finish'].strftime('%Y-%m-%d'))
+
+    def build_timeline():
+        fig3 = px.timeline(phases, x_start="Start", x_end="Finish", y="Phase", color="Category", color_discrete_map=colors)
+        fig3.update_yaxes(autorange="reversed")
+        fig3.update_layout(height=400, title='Project Timeline', template='plotly_white', xaxis_title="Timeline", yaxis_title="")
+        return fig3
+    show_chart(('roadmap',), build_timeline)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-fig3 = px.timeline(phases, x_start="Start", x_end="Finish", y="Phase", color="Category", color_discrete_map=colors)
-fig3.update_yaxes(autorange="reversed")
-fig3.update_layout(height=400, title='Project Timeline', template='plotly_white', xaxis_title="Timeline", yaxis_title="")
-st.plotly_chart(fig3, use_container_width=True)
-st.markdown("</div>", unsafe_allow_html=True)
+    cols = st.columns(6)
+    for col, row in zip(cols, phases.itertuples()):
+        with col:
+            st.markdown(f"<div class='phase-card'><div class='phase-progress'>{row.Progress}%</div><div class='phase-label'>{row.Category}</div></div>", unsafe_allow_html=True)
 
-cols = st.columns(6)
-for col, row in zip(cols, phases.itertuples()):
-    with col:
-        st.markdown(f"<div class='phase-card'><div class='phase-progress'>{row.Progress}%</div><div class='phase-label'>{row.Category}</div></div>", unsafe_allow_html=True)
+roadmap_section()
 
 # =========================
 # RECOMMENDATIONS
@@ -774,18 +1088,69 @@ with col2:
 # =========================
 st.markdown("<h2 class='section-header'>DETAILED DATA TABLE</h2>", unsafe_allow_html=True)
 
-with st.expander("📊 View Complete Dataset", expanded=False):
-    st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
-    st.dataframe(df_filtered.style.background_gradient(subset=['Risk_Score'], cmap='RdYlGn_r'), use_container_width=True, height=400)
-    st.markdown("</div>", unsafe_allow_html=True)
+# Only the visible page is fetched and styled; sorting runs server-side on the
+# shared filtered view and the Risk_Score gradient is a per-dataset lookup table.
+# Like the tabs, in lazy mode a collapsed table is not built at all.
+@st.fragment
+@profiler.profiled("table")
+def data_table_section(view_key, df_filtered, palette, lazy):
+    table = st.expander("📊 View Complete Dataset", expanded=False, key="data_table",
+                        on_change="rerun" if lazy else "ignore")
+    with table:
+        if table.open is False:
+            return
+        st.markdown("<div class='chart-container'>", unsafe_allow_html=True)
+        n_rows = len(df_filtered)
+        col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+        with col1:
+            sort_col = st.selectbox("Sort by", ["(none)"] + list(df_filtered.columns), key="table_sort")
+        with col2:
+            ascending = st.toggle("Ascending", value=True, key="table_ascending")
+        with col3:
+            page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1, key="table_page_size")
+        pages = max(1, -(-n_rows // page_size))
+        if st.session_state.get("table_page", 1) > pages:
+            st.session_state.table_page = pages
+        with col4:
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, key="table_page")
+        
+        start = (page - 1) * page_size
+        if sort_col == "(none)":
+            window = df_filtered.iloc[start:start + page_size]
+        else:
+            order = table_sort_order(view_key, sort_col, ascending, df_filtered)
+            window = df_filtered.iloc[order[start:start + page_size]]
+        st.dataframe(window.style.apply(palette.styles, subset=['Risk_Score']), use_container_width=True, height=400)
+        st.caption(f"Rows {start + 1:,}–{start + len(window):,} of {n_rows:,}" if n_rows else "No rows match the current filters")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+data_table_section(view_key, df_filtered, risk_palette(frame_key, load_years, df), lazy_views)
 
 # =========================
 # FOOTER
 # =========================
-st.markdown("""
+with profiler.span("footer"):
+    st.markdown("""
 <div class='dashboard-footer'>
     <p class='footer-title'>BOEING DIGITAL OVERSIGHT SYSTEM | VERSION 2.0</p>
     <p class='footer-meta'>© 2025 The Boeing Company | Powered by Advanced Analytics & Machine Learning<br>
     Last Updated: November 2025 | Confidential & Proprietary</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Filled last so the counters include this run's figure lookups
+cache_stats = get_figure_cache().stats()
+figure_cache_status.caption(f"Figure cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses · "
+                            f"{cache_stats['entries']} figures · {cache_stats['bytes'] / 2**20:.1f} MB")
+
+profiler.end_run()
+if diagnostics:
+    with diagnostics_panel:
+        spans = profiler.run_spans()
+        st.caption(f"This run: {spans['ms'].iloc[-1]:,.0f} ms · set OVERSIGHT_PROFILE_LOG to export spans as JSON lines")
+        st.dataframe(spans.assign(section=spans['depth'].map(lambda d: "· " * d) + spans['section']).drop(columns='depth'),
+                     hide_index=True, use_container_width=True,
+                     column_config={'ms': st.column_config.NumberColumn(format="%.1f")})
+        st.markdown("**Rolling, all sessions**")
+        st.dataframe(profiler.stats(), hide_index=True, use_container_width=True,
+                     column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ('p50_ms', 'p95_ms', 'max_ms')})
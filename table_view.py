@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# PAGED TABLE HELPERS
+# =========================
+# ColorBrewer RdYlGn reversed (green = low risk, red = high), matching cmap='RdYlGn_r'
+RISK_GRADIENT = ['#006837', '#1a9850', '#66bd63', '#a6d96a', '#d9ef8b', '#ffffbf',
+                 '#fee08b', '#fdae61', '#f46d43', '#d73027', '#a50026']
+PALETTE_SIZE = 256
+
+
+def _luminance(rgb):
+    channel = rgb / 255
+    channel = np.where(channel <= 0.03928, channel / 12.92, ((channel + 0.055) / 1.055) ** 2.4)
+    return channel @ np.array([0.2126, 0.7152, 0.0722])
+
+
+class GradientPalette:
+    """Precomputed background-gradient CSS for one column's value range.
+
+    Built once per dataset; styling a page is a vectorized lookup into
+    ``PALETTE_SIZE`` CSS strings, so matplotlib and a full-frame Styler are
+    never needed.
+    """
+
+    def __init__(self, values, stops=RISK_GRADIENT):
+        values = np.asarray(values, dtype='float64')
+        finite = values[np.isfinite(values)]
+        self.vmin = float(finite.min()) if len(finite) else 0.0
+        self.vmax = float(finite.max()) if len(finite) else 1.0
+        rgb = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in stops], dtype='float64')
+        at = np.linspace(0, 1, len(stops))
+        grid = np.linspace(0, 1, PALETTE_SIZE)
+        palette = np.column_stack([np.interp(grid, at, rgb[:, i]) for i in range(3)])
+        # Same contrast rule as Styler.background_gradient(text_color_threshold=0.408)
+        dark = _luminance(palette) < 0.408
+        self.css = np.array([f"background-color: #{r:02x}{g:02x}{b:02x}; color: {'#f1f1f1' if d else '#000000'}"
+                             for (r, g, b), d in zip(palette.round().astype(int), dark)], dtype=object)
+
+    def styles(self, values):
+        values = np.asarray(values, dtype='float64')
+        span = self.vmax - self.vmin
+        scaled = (values - self.vmin) / span if span else np.zeros_like(values)
+        codes = np.clip(np.nan_to_num(scaled, nan=0.0) * (PALETTE_SIZE - 1), 0, PALETTE_SIZE - 1).round().astype(int)
+        return np.where(np.isfinite(values), self.css[codes], '')
+
+
+def sort_order(series, ascending=True):
+    """Row positions that sort ``series``, stable, with missing values last."""
+    # Keep the dtype so an ordered categorical sorts by its categories, not alphabetically
+    return series.reset_index(drop=True).sort_values(ascending=ascending, kind='stable',
+                                                     na_position='last').index.to_numpy()
@@ -0,0 +1,390 @@
+"""Live supplier telemetry: an asyncio tailer feeding a bounded ring buffer.
+
+    python telemetry.py write telemetry.csv --rate 50000 --seconds 60
+    python telemetry.py write unix:/tmp/oversight.sock --rate 50000
+
+Records are header-less CSV lines in the dataset column order (DTYPES).
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from data_loader import DTYPES, RISK_MAPPING
+from metrics_cube import level_summary
+from risk_engine import risk_columns
+
+# =========================
+# RING BUFFER
+# =========================
+TELEMETRY_COLUMNS = list(DTYPES)
+NUMERIC_COLUMNS = [c for c in TELEMETRY_COLUMNS if c != 'Risk_Level']
+DEFAULT_CAPACITY = 500_000
+READ_CHUNK = 4 * 2**20
+POLL_INTERVAL = 0.05
+# On start a file is replayed from roughly this many bytes per buffered row before its end
+BACKFILL_BYTES_PER_ROW = 160
+LEVELS = np.array(list(RISK_MAPPING), dtype=object)
+
+logger = logging.getLogger("oversight.telemetry")
+
+
+class RingBuffer:
+    """The last ``capacity`` telemetry rows in preallocated columns.
+
+    ``seq`` counts every row ever appended; row ``s`` lives in slot
+    ``s % capacity`` until it is overwritten. Readers copy under the lock,
+    so returned frames never change as the writer wraps around.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.columns = {c: np.zeros(capacity, dtype=DTYPES[c]) for c in NUMERIC_COLUMNS}
+        self.codes = np.full(capacity, -1, dtype=np.int8)
+        self.seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, columns, codes):
+        n = len(codes)
+        if n > self.capacity:
+            columns = {c: values[-self.capacity:] for c, values in columns.items()}
+            codes, skipped = codes[-self.capacity:], n - self.capacity
+        else:
+            skipped = 0
+        with self._lock:
+            start = (self.seq + skipped) % self.capacity
+            first = min(len(codes), self.capacity - start)
+            for c, values in columns.items():
+                self.columns[c][start:start + first] = values[:first]
+                self.columns[c][:len(codes) - first] = values[first:]
+            self.codes[start:start + first] = codes[:first]
+            self.codes[:len(codes) - first] = codes[first:]
+            self.seq += n
+
+    def since(self, seq, end=None):
+        """Rows ``seq`` up to ``end`` that are still buffered, and the seq of the first one."""
+        with self._lock:
+            end = self.seq if end is None else min(end, self.seq)
+            start = min(max(seq, self.seq - self.capacity, 0), end)
+            slots = np.arange(start, end) % self.capacity
+            columns = {c: values[slots] for c, values in self.columns.items()}
+            codes = self.codes[slots]
+        return _frame(columns, codes, pd.RangeIndex(start, end)), start
+
+    def bounds(self, columns):
+        """(min, max) of each numeric column over the buffered rows, read in place."""
+        with self._lock:
+            filled = min(self.seq, self.capacity)
+            return {c: (self.columns[c][:filled].min(), self.columns[c][:filled].max()) for c in columns}
+
+    def snapshot(self):
+        """All buffered rows, indexed by seq, and the seq just past the last one."""
+        frame, start = self.since(0)
+        return frame, start + len(frame)
+
+
+def _frame(columns, codes, index):
+    frame = pd.DataFrame(columns, index=index)
+    frame['Risk_Level'], frame['Risk_Score'] = risk_columns(codes, index)
+    return frame[TELEMETRY_COLUMNS + ['Risk_Score']]
+
+
+# =========================
+# PARSING
+# =========================
+def parse_records(data):
+    """Numeric columns and risk codes from a block of complete CSV lines.
+
+    Returns ``(columns, codes, dropped)``. Rows with unparseable values are
+    dropped rather than failing the whole block.
+    """
+    skipped = []
+    try:
+        table = pacsv.read_csv(
+            io.BytesIO(data),
+            read_options=pacsv.ReadOptions(column_names=TELEMETRY_COLUMNS),
+            parse_options=pacsv.ParseOptions(invalid_row_handler=lambda row: skipped.append(row) or 'skip'),
+            convert_options=pacsv.ConvertOptions(column_types={c: pa.from_numpy_dtype(np.dtype(DTYPES[c]))
+                                                               for c in NUMERIC_COLUMNS}))
+        frame = table.to_pandas()
+        dropped = len(skipped)
+    except pa.ArrowInvalid:
+        # A bad value somewhere in the block: coerce row by row instead
+        frame = pd.read_csv(io.BytesIO(data), header=None, names=TELEMETRY_COLUMNS, dtype=str, on_bad_lines='skip')
+        numeric = frame[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        valid = numeric.notna().all(axis=1).to_numpy()
+        dropped = data.count(b'\n') - int(valid.sum())
+        frame = numeric[valid].astype({c: DTYPES[c] for c in NUMERIC_COLUMNS}).assign(Risk_Level=frame['Risk_Level'][valid])
+    levels = pd.Categorical(frame['Risk_Level'], categories=LEVELS)
+    columns = {c: frame[c].to_numpy(dtype=DTYPES[c]) for c in NUMERIC_COLUMNS}
+    return columns, levels.codes.astype(np.int8), dropped
+
+
+# =========================
+# INGESTION
+# =========================
+class TelemetryFeed:
+    """Tails ``source`` into a RingBuffer from an asyncio loop on a daemon thread.
+
+    ``source`` is a file path (tailed as it grows, replaying about a buffer's
+    worth of its end on start) or ``unix:/path`` (a socket that any number of
+    writers connect to). Parsing runs in pyarrow, which releases the GIL, so
+    sessions keep rendering while records stream in.
+    """
+
+    def __init__(self, source, capacity=None):
+        self.source = source
+        self.buffer = RingBuffer(capacity or int(os.environ.get("OVERSIGHT_TELEMETRY_CAPACITY", DEFAULT_CAPACITY)))
+        self.dropped = 0
+        self.last_received = None
+        self.error = None
+        self._samples = deque(maxlen=64)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-ingest", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stopping.set()
+        self._thread.join(timeout=2)
+
+    def stats(self):
+        now = time.time()
+        samples = [s for s in list(self._samples) if now - s[0] <= 5]
+        rate = (samples[-1][1] - samples[0][1]) / max(now - samples[0][0], 1e-9) if len(samples) > 1 else 0.0
+        return {'rows': min(self.buffer.seq, self.buffer.capacity), 'received': self.buffer.seq, 'rate': rate,
+                'dropped': self.dropped, 'last_received': self.last_received, 'error': self.error}
+
+    def _ingest(self, data):
+        columns, codes, dropped = parse_records(data)
+        self.dropped += dropped
+        if len(codes):
+            self.buffer.append(columns, codes)
+            self.last_received = time.time()
+            self._samples.append((self.last_received, self.buffer.seq))
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.exception("Telemetry ingestion stopped")
+
+    async def _main(self):
+        if self.source.startswith("unix:"):
+            await self._serve(self.source[len("unix:"):])
+        else:
+            await self._tail(Path(self.source))
+
+    async def _tail(self, path):
+        while not path.exists():
+            if self._stopping.is_set():
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+        with open(path, 'rb') as f:
+            start = max(0, path.stat().st_size - self.buffer.capacity * BACKFILL_BYTES_PER_ROW)
+            f.seek(start)
+            if start:
+                f.readline()  # land on a line boundary
+            pending = b''
+            while not self._stopping.is_set():
+                data = f.read(READ_CHUNK)
+                if not data:
+                    if path.stat().st_size < f.tell():
+                        f.seek(0)  # truncated and rewritten
+                        pending = b''
+                    await asyncio.sleep(POLL_INTERVAL)
+                    continue
+                pending += data
+                cut = pending.rfind(b'\n') + 1
+                if cut:
+                    self._ingest(pending[:cut])
+                    pending = pending[cut:]
+
+    async def _serve(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+        async def handle(reader, writer):
+            pending = b''
+            while data := await reader.read(READ_CHUNK):
+                pending += data
+                cut = pending.rfind(b'\n') + 1
+                if cut:
+                    self._ingest(pending[:cut])
+                    pending = pending[cut:]
+            if pending:
+                self._ingest(pending + b'\n')
+            writer.close()
+
+        server = await asyncio.start_unix_server(handle, path)
+        async with server:
+            while not self._stopping.is_set():
+                await asyncio.sleep(POLL_INTERVAL)
+
+
+# =========================
+# INCREMENTAL LIVE VIEW
+# =========================
+class LiveView:
+    """Filtered rows of a RingBuffer plus MetricsCube-style aggregates.
+
+    ``refresh`` filters only the rows appended since the last call and adds
+    their per-level count/gap/order sums; rows that fell out of the buffer
+    are dropped from the front with their sums subtracted. ``None`` bounds
+    are open, so rows outside the range seen when the filters were set still
+    match an untouched slider.
+    """
+
+    MAX_CHUNKS = 16
+
+    def __init__(self, buffer, year_range, risk_levels, gap_threshold, order_range):
+        self.buffer = buffer
+        self.bounds = {'Year': year_range, 'Orders': order_range, 'Predicted_Gap': (gap_threshold, None)}
+        self.level_mask = np.isin(LEVELS, list(risk_levels))
+        self.seq = 0
+        self.chunks = deque()
+        self.counts = np.zeros(len(LEVELS), dtype=np.int64)
+        self.gaps = np.zeros(len(LEVELS))
+        self.orders = np.zeros(len(LEVELS), dtype=np.int64)
+        self._frame = None
+        self._lock = threading.RLock()
+
+    def _mask(self, frame):
+        keep = np.ones(len(frame), dtype=bool)
+        for col, (low, high) in self.bounds.items():
+            values = frame[col].to_numpy()
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+        # Rows without a risk level never match, as in FilterIndex
+        codes = frame['Risk_Score'].fillna(0).to_numpy(dtype=np.int64) - 1
+        keep &= (codes >= 0) & self.level_mask[np.maximum(codes, 0)]
+        return keep
+
+    def _sums(self, frame):
+        codes = frame['Risk_Score'].fillna(0).to_numpy(dtype=np.int64) - 1
+        known = codes >= 0
+        n = len(LEVELS)
+        return (np.bincount(codes[known], minlength=n),
+                np.bincount(codes[known], weights=frame['Predicted_Gap'].to_numpy(dtype='float64')[known], minlength=n),
+                np.bincount(codes[known], weights=frame['Orders'].to_numpy(dtype='float64')[known], minlength=n).astype(np.int64))
+
+    def _add(self, frame, sign):
+        counts, gaps, orders = self._sums(frame)
+        self.counts += sign * counts
+        self.gaps += sign * gaps
+        self.orders += sign * orders
+
+    def refresh(self, end=None):
+        """Fold in buffer rows up to ``end``; returns the filtered frame (indexed by seq)."""
+        with self._lock:
+            new, start = self.buffer.since(self.seq, end)
+            advanced = start + len(new)
+            if len(new):
+                new = new[self._mask(new)]
+                if len(new):
+                    self._add(new, 1)
+                    self.chunks.append(new)
+            # The view covers the same window as a buffer snapshot taken at `advanced`
+            evicted = self._evict(advanced - self.buffer.capacity)
+            if advanced > self.seq or evicted:
+                self.seq = max(self.seq, advanced)
+                self._frame = None
+                if len(self.chunks) > self.MAX_CHUNKS:
+                    self.chunks = deque([pd.concat(self.chunks)])
+            if self._frame is None:
+                self._frame = pd.concat(self.chunks) if self.chunks else self.buffer.since(0, 0)[0]
+            return self._frame
+
+    def _evict(self, oldest):
+        evicted = False
+        while self.chunks and self.chunks[0].index[0] < oldest:
+            chunk = self.chunks.popleft()
+            gone = chunk.index < oldest
+            self._add(chunk[gone], -1)
+            evicted = True
+            if not gone.all():
+                self.chunks.appendleft(chunk[~gone])
+                break
+        return evicted
+
+    def query(self, end=None):
+        """``refresh`` and ``stats`` as one consistent pair, even with other sessions refreshing."""
+        with self._lock:
+            return self.refresh(end), self.stats()
+
+    def stats(self):
+        """The same dict as MetricsCube.query; ``critical_pos`` indexes the filtered frame."""
+        with self._lock:
+            counts, gaps, orders = self.counts.copy(), self.gaps.copy(), self.orders.copy()
+            frame = self._frame
+        # Only the highest present level needs its first row
+        first_pos = np.full(len(LEVELS), np.iinfo(np.int64).max)
+        present = np.flatnonzero(counts)
+        if len(present):
+            top = present[-1]
+            first_pos[top] = np.argmax(frame['Risk_Score'].to_numpy(dtype='float64', na_value=np.nan) == top + 1)
+        return level_summary(LEVELS, counts, gaps, int(orders.sum()), first_pos)
+
+
+# =========================
+# TEST WRITER
+# =========================
+def write_telemetry(target, rate=50_000, seconds=10.0, batch_rows=5_000, seed=0):
+    """Append synthetic records to a file or ``unix:`` socket at about ``rate`` rows/s."""
+    from benchmark import synthetic_chunk
+
+    rng = np.random.default_rng(seed)
+    if target.startswith("unix:"):
+        sink = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sink.connect(target[len("unix:"):])
+        write = sink.sendall
+    else:
+        sink = open(target, 'ab')
+
+        def write(payload):
+            sink.write(payload)
+            sink.flush()
+    sent = 0
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < seconds:
+            batch = synthetic_chunk(batch_rows, rng)[TELEMETRY_COLUMNS]
+            write(batch.to_csv(header=False, index=False).encode())
+            sent += batch_rows
+            ahead = sent / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    finally:
+        sink.close()
+    return sent, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    write = sub.add_parser("write", help="Stream synthetic records to a file or unix: socket")
+    write.add_argument("target")
+    write.add_argument("--rate", type=float, default=50_000, help="Rows per second")
+    write.add_argument("--seconds", type=float, default=60)
+    write.add_argument("--batch", type=int, default=5_000)
+    write.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sent, elapsed = write_telemetry(args.target, args.rate, args.seconds, args.batch, args.seed)
+    print(f"Wrote {sent:,} records in {elapsed:.1f}s ({sent / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()